@@ -2,15 +2,29 @@ import pytest
 import requests
 from rest_framework.test import APIClient
 
+# Shape of the shared dataset: large enough for realistic query plans and
+# pagination, small enough to build in about a second.
+SEEDED_DATASET = dict(departments=8, clinicians=60, patients=3000, procedures=12000, seed=7)
+
+
+# Tests are isolated by pytest-django's per-test transaction (a savepoint when
+# an outer transaction is open), so nothing needs deleting afterwards.
+def pytest_collection_modifyitems(items):
+    # seeded_dataset rows stay for the rest of the session; run its users last
+    # so the other tests keep starting from empty tables.
+    items.sort(key=lambda item: "seeded_dataset" in item.fixturenames)
+
 
 @pytest.fixture
 def client():
-    return requests.Session()
+    with requests.Session() as session:
+        yield session
 
 
+# End-to-end tests talk HTTP to a server thread that shares the test database.
 @pytest.fixture
-def base_url():
-    return "http://localhost:8000/api"
+def base_url(live_server, transactional_db):
+    return f"{live_server.url}/api"
 
 
 @pytest.fixture
@@ -48,50 +62,29 @@ def patient(db):
 
 
 @pytest.fixture(autouse=True)
-def cleanup(request, db):
-    from hospital.departments.models import Department
-    from hospital.clinicians.models import Clinician
-    from hospital.patients.models import Patient, Procedure
-
-    initial_department_ids = set(Department.objects.values_list("id", flat=True))
-    initial_clinician_ids = set(Clinician.objects.values_list("id", flat=True))
-    initial_patient_ids = set(Patient.objects.values_list("id", flat=True))
-    initial_procedure_ids = set(Procedure.objects.values_list("id", flat=True))
-
-    yield
-
-    current_procedure_ids = set(Procedure.objects.values_list("id", flat=True))
-    new_procedure_ids = current_procedure_ids - initial_procedure_ids
-
-    for procedure_id in new_procedure_ids:
-        try:
-            Procedure.objects.filter(id=procedure_id).delete()
-        except Exception:
-            pass
-
-    current_patient_ids = set(Patient.objects.values_list("id", flat=True))
-    new_patient_ids = current_patient_ids - initial_patient_ids
-
-    for patient_id in new_patient_ids:
-        try:
-            Patient.objects.filter(id=patient_id).delete()
-        except Exception:
-            pass
-
-    current_clinician_ids = set(Clinician.objects.values_list("id", flat=True))
-    new_clinician_ids = current_clinician_ids - initial_clinician_ids
-
-    for clinician_id in new_clinician_ids:
-        try:
-            Clinician.objects.filter(id=clinician_id).delete()
-        except Exception:
-            pass
-
-    current_department_ids = set(Department.objects.values_list("id", flat=True))
-    new_department_ids = current_department_ids - initial_department_ids
-
-    for department_id in new_department_ids:
+def aggregate_cache():
+    from django.core.cache import caches
+    from hospital.cache import CACHE_ALIAS, stats
+
+    caches[CACHE_ALIAS].clear()
+    stats.reset()
+    yield caches[CACHE_ALIAS]
+
+
+# Built once per session (per worker under xdist) through datagen's bulk
+# inserts, inside a transaction that is rolled back when the session ends.
+# Tests using it run in savepoints, so their writes are undone as usual; they
+# cannot use transactional_db or live_server.
+@pytest.fixture(scope="session")
+def seeded_dataset(django_db_setup, django_db_blocker):
+    from django.db import transaction
+    from hospital.datagen import generate
+
+    with django_db_blocker.unblock():
+        outer = transaction.atomic()
+        outer.__enter__()
         try:
-            Department.objects.filter(id=department_id).delete()
-        except Exception:
-            pass
+            yield generate(**SEEDED_DATASET)
+        finally:
+            transaction.set_rollback(True)
+            outer.__exit__(None, None, None)
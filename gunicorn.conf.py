@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+# gthread serves hospital.wsgi; use uvicorn.workers.UvicornWorker with hospital.asgi.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread" if threads > 1 else "sync")
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+# On SIGTERM or SIGHUP (reload), workers get this long to finish in-flight requests.
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", "5"))
+
+# Recycle workers periodically so slow leaks cannot accumulate; the jitter
+# keeps them from restarting at the same moment.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+# Cache invalidation only reaches the process that handled the write, so with
+# per-process local memory every other worker can serve stale aggregates until
+# their TTL expires. The default image still has to boot, so this warns unless
+# GUNICORN_REQUIRE_SHARED_CACHE=1 asks for a hard failure.
+def on_starting(server):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hospital.settings")
+    from django.conf import settings
+
+    if server.cfg.workers > 1 and settings.CACHES["aggregates"]["BACKEND"].endswith("LocMemCache"):
+        message = (
+            f"The aggregates cache is process-local but {server.cfg.workers} workers are "
+            "configured, so they may serve stale aggregates for up to AGGREGATE_CACHE_TTL "
+            "seconds after a write. Set AGGREGATE_CACHE_BACKEND and AGGREGATE_CACHE_LOCATION to a "
+            "shared cache such as Redis, or run with WEB_CONCURRENCY=1"
+        )
+        if os.environ.get("GUNICORN_REQUIRE_SHARED_CACHE") == "1":
+            raise RuntimeError(message)
+        server.log.warning(message)
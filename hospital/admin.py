@@ -1,9 +1,53 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from .departments.models import Department
 from .clinicians.models import Clinician
 from .patients.models import Patient, Procedure
 
 
+def estimated_count(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        # Autovacuum never analyzes a partitioned parent, so its own reltuples
+        # goes stale; the partitions' statistics are summed instead.
+        cursor.execute(
+            "SELECT CASE WHEN parent.relkind = 'p' THEN ("
+            "  SELECT sum(greatest(child.reltuples, 0)) FROM pg_inherits "
+            "  JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "  WHERE pg_inherits.inhparent = parent.oid"
+            ") ELSE parent.reltuples END::bigint "
+            "FROM pg_class parent WHERE parent.oid = %s::regclass",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 (or 0) until the table has been vacuumed or analyzed.
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+# COUNT(*) over millions of rows takes seconds. An unfiltered changelist only
+# needs roughly right page links, so large tables use the planner's estimate;
+# filtered and searched changelists still count exactly.
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+
+
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
     list_display = ["name", "created_at", "updated_at"]
@@ -14,19 +58,27 @@ class DepartmentAdmin(admin.ModelAdmin):
 class ClinicianAdmin(admin.ModelAdmin):
     list_display = ["name", "department", "created_at", "updated_at"]
     list_filter = ["department"]
+    list_select_related = ["department"]
     search_fields = ["name"]
 
 
+# Clinicians are picked through autocomplete rather than a widget listing all
+# of them; the date hierarchy uses the indexed created_at column.
 @admin.register(Patient)
-class PatientAdmin(admin.ModelAdmin):
+class PatientAdmin(LargeTableAdmin):
     list_display = ["name", "email", "gender", "date_of_birth", "created_at", "updated_at"]
-    list_filter = ["gender", "date_of_birth"]
+    list_filter = ["gender"]
     search_fields = ["name", "email"]
-    filter_horizontal = ["clinicians"]
+    autocomplete_fields = ["clinicians"]
+    date_hierarchy = "created_at"
 
 
 @admin.register(Procedure)
-class ProcedureAdmin(admin.ModelAdmin):
+class ProcedureAdmin(LargeTableAdmin):
     list_display = ["name", "patient", "clinician", "date", "created_at", "updated_at"]
-    list_filter = ["date", "clinician__department"]
+    list_filter = ["clinician__department"]
+    # Clinician.__str__ follows the department.
+    list_select_related = ["patient", "clinician__department"]
     search_fields = ["name", "patient__name", "clinician__name"]
+    autocomplete_fields = ["patient", "clinician"]
+    date_hierarchy = "date"
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HospitalConfig(AppConfig):
+    name = "hospital"
+
+    def ready(self):
+        from . import cache, counters  # noqa: F401
+        from .sync import signals  # noqa: F401
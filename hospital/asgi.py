@@ -0,0 +1,9 @@
+import os
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hospital.settings")
+
+# WhiteNoise only wraps WSGI apps. Django's handler serves /static/ here and
+# passes every other request straight to the async application.
+application = ASGIStaticFilesHandler(get_asgi_application())
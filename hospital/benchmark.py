@@ -0,0 +1,338 @@
+import math
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import requests as http
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from .datagen import LAST_NAMES, PROCEDURE_NAMES
+from .departments.models import Department
+from .clinicians.models import Clinician
+from .patients.models import Patient
+
+BULK_SIZE = 20
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Scenarios:
+    # Scenarios that create or modify rows; only run by default on a seeded database.
+    WRITES = {
+        "patient_create",
+        "patient_update",
+        "assign_procedure",
+        "patient_bulk",
+        "bulk_assign_procedures",
+    }
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.patient_ids = list(Patient.objects.values_list("id", flat=True))
+        self.clinician_ids = list(Clinician.objects.values_list("id", flat=True))
+        # Departments without clinicians answer 404, so only staffed ones are sampled.
+        self.department_ids = list(
+            Department.objects.filter(clinicians__isnull=False)
+            .distinct()
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.pages = max(math.ceil(len(self.patient_ids) / api_settings.PAGE_SIZE), 1)
+        self.counter = 0
+
+    def _email(self):
+        self.counter += 1
+        return f"bench.{self.rng.getrandbits(48):x}.{self.counter}@example.org"
+
+    def _procedure(self):
+        return {
+            "name": self.rng.choice(PROCEDURE_NAMES),
+            "date": (timezone.now() + timedelta(days=self.rng.randint(1, 90))).isoformat(),
+            "clinician": self.rng.choice(self.clinician_ids),
+        }
+
+    def patient_list(self):
+        return "get", reverse("patient-list"), {"page": self.rng.randint(1, self.pages)}
+
+    def patient_list_cursor(self):
+        return "get", reverse("patient-list"), {"pagination": "cursor"}
+
+    def patient_search(self):
+        return "get", reverse("patient-list"), {"search": self.rng.choice(LAST_NAMES)}
+
+    def patient_detail(self):
+        pk = self.rng.choice(self.patient_ids)
+        return "get", reverse("patient-detail", kwargs={"pk": pk}), None
+
+    def patient_create(self):
+        data = {
+            "name": "Bench Patient",
+            "email": self._email(),
+            "gender": "O",
+            "date_of_birth": "1980-01-01",
+        }
+        return "post", reverse("patient-list"), data
+
+    def patient_update(self):
+        pk = self.rng.choice(self.patient_ids)
+        data = {"name": f"Bench Patient {self.counter}"}
+        self.counter += 1
+        return "patch", reverse("patient-detail", kwargs={"pk": pk}), data
+
+    def assign_procedure(self):
+        pk = self.rng.choice(self.patient_ids)
+        return "post", reverse("patient-assign-procedure", kwargs={"pk": pk}), self._procedure()
+
+    def patient_bulk(self):
+        data = [
+            {
+                "name": "Bench Patient",
+                "email": self._email(),
+                "gender": "O",
+                "date_of_birth": "1980-01-01",
+            }
+            for _ in range(BULK_SIZE)
+        ]
+        return "post", reverse("patient-bulk"), data
+
+    def bulk_assign_procedures(self):
+        data = [
+            {**self._procedure(), "patient": self.rng.choice(self.patient_ids)}
+            for _ in range(BULK_SIZE)
+        ]
+        return "post", reverse("patient-bulk-assign-procedures"), data
+
+    def export(self):
+        department_id = self.rng.choice(self.department_ids)
+        return "get", reverse("patient-export"), {"department_id": department_id}
+
+    def by_procedure(self):
+        name = self.rng.choice(PROCEDURE_NAMES).split()[-1]
+        return "get", reverse("patient-by-procedure"), {"procedure_name": name}
+
+    def by_department(self):
+        department_id = self.rng.choice(self.department_ids)
+        return (
+            "get",
+            reverse("clinician-patient-count-by-department"),
+            {"department_id": department_id},
+        )
+
+    def by_department_all(self):
+        return "get", reverse("clinician-patient-count-by-department"), None
+
+    def procedure_timeline(self):
+        params = {"group_by": self.rng.choice(["department", "clinician"]), "bucket": "week"}
+        return "get", reverse("procedure-timeline"), params
+
+    def department_rollups(self):
+        return "get", reverse("departmentrollup-list"), None
+
+    def change_feed_patients(self):
+        return "get", reverse("changes-patients"), {"limit": 100}
+
+    def change_feed_procedures(self):
+        return "get", reverse("changes-procedures"), {"limit": 100}
+
+    # Async variants under /api/async/, for comparing ASGI serving with the sync views.
+    def async_patient_list(self):
+        _, _, params = self.patient_list()
+        return "get", reverse("async-patient-list"), params
+
+    def async_patient_search(self):
+        _, _, params = self.patient_search()
+        return "get", reverse("async-patient-list"), params
+
+    def async_patient_detail(self):
+        pk = self.rng.choice(self.patient_ids)
+        return "get", reverse("async-patient-detail", kwargs={"pk": pk}), None
+
+    def async_by_procedure(self):
+        _, _, params = self.by_procedure()
+        return "get", reverse("async-patient-by-procedure"), params
+
+    def async_by_department(self):
+        _, _, params = self.by_department()
+        return "get", reverse("async-clinician-patient-count-by-department"), params
+
+    @classmethod
+    def names(cls, writes=True):
+        return [
+            name
+            for name, value in vars(cls).items()
+            if callable(value)
+            and not name.startswith("_")
+            and name != "names"
+            and (writes or name not in cls.WRITES)
+        ]
+
+
+def _summarize(durations, elapsed, queries, statuses):
+    requests = len(durations)
+    durations = sorted(durations)
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "mean_ms": round(sum(durations) / requests * 1000, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "queries_per_request": None if queries is None else round(queries / requests, 2),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def _measure(client, scenario, requests):
+    durations, queries, statuses = [], 0, {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        method, url, data = scenario()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            if method == "get":
+                response = client.get(url, data)
+            else:
+                response = getattr(client, method)(url, data, format="json")
+            # Streamed bodies run their queries while being read.
+            if response.streaming:
+                b"".join(response.streaming_content)
+            durations.append(time.perf_counter() - start)
+        queries += len(context.captured_queries)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return _summarize(durations, time.perf_counter() - started, queries, statuses)
+
+
+_SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def _measure_http(base_url, scenario, requests, concurrency):
+    # Requests are drawn up front so the sequence stays reproducible for a seed
+    # regardless of how the worker threads interleave.
+    calls = [scenario() for _ in range(requests)]
+    local = threading.local()
+
+    def send(call):
+        method, path, data = call
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = http.Session()
+        payload = {"params": data} if method == "get" else {"json": data}
+        start = time.perf_counter()
+        response = session.request(method, base_url + path, **payload)
+        duration = time.perf_counter() - start
+        # Query counts are only known when the server runs with REQUEST_INSTRUMENTATION=1.
+        match = _SERVER_TIMING_QUERIES.search(response.headers.get("Server-Timing", ""))
+        return duration, response.status_code, match and int(match.group(1))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send, calls))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for _, code, _ in outcomes:
+        statuses[code] = statuses.get(code, 0) + 1
+    counts = [count for _, _, count in outcomes]
+    queries = None if None in counts else sum(counts)
+    return _summarize([duration for duration, _, _ in outcomes], elapsed, queries, statuses)
+
+
+def _log_result(log, name, result):
+    queries = result["queries_per_request"]
+    log(
+        f"{name:<22} p50={result['p50_ms']:>8.2f}ms "
+        f"p95={result['p95_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+        f"{result['requests_per_second']:>8.1f} req/s "
+        + (f"{queries:>6.2f} queries/req" if queries is not None else "")
+    )
+
+
+# With base_url set, requests go over HTTP to a running server (which must use
+# the configured database) from `concurrency` threads; otherwise they run
+# in-process through the test client. Without `writes`, the default scenario
+# list leaves out the ones that change data.
+def run_benchmark(
+    requests=200,
+    warmup=10,
+    seed=0,
+    only=None,
+    base_url=None,
+    concurrency=1,
+    writes=True,
+    log=lambda message: None,
+):
+    rng = random.Random(seed)
+    scenarios = Scenarios(rng)
+    client = APIClient()
+    results = {}
+    for name in only or Scenarios.names(writes):
+        scenario = getattr(scenarios, name)
+        if base_url:
+            if warmup:
+                _measure_http(base_url, scenario, warmup, concurrency)
+            results[name] = _measure_http(base_url, scenario, requests, concurrency)
+        else:
+            if warmup:
+                _measure(client, scenario, warmup)
+            results[name] = _measure(client, scenario, requests)
+        _log_result(log, name, results[name])
+    return {
+        "revision": _git_revision(),
+        "timestamp": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "mode": "http" if base_url else "in-process",
+        "base_url": base_url,
+        "concurrency": concurrency if base_url else 1,
+        "requests_per_scenario": requests,
+        "writes": writes,
+        "scenarios": results,
+    }
+
+
+def _queries(result):
+    queries = result.get("queries_per_request")
+    return "   n/a" if queries is None else f"{queries:>6.2f}"
+
+
+def compare(previous, current):
+    lines = []
+    for name, result in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            lines.append(f"{name:<22} (new)")
+            continue
+        change = (
+            (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            if before["p95_ms"]
+            else 0
+        )
+        lines.append(
+            f"{name:<22} p95 {before['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f}ms "
+            f"({change:+.1f}%) req/s {before['requests_per_second']:>8.1f} -> "
+            f"{result['requests_per_second']:>8.1f} queries "
+            f"{_queries(before)} -> {_queries(result)}"
+        )
+    return lines
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+from .departments.models import Department
+from .clinicians.models import Clinician
+from .patients.models import Patient, Procedure
+from .routers import reading_from_replicas
+
+CACHE_ALIAS = "aggregates"
+BY_DEPARTMENT = "by_department"
+BY_PROCEDURE = "by_procedure"
+TIMELINE = "procedure_timeline"
+NAMESPACES = [BY_DEPARTMENT, BY_PROCEDURE, TIMELINE]
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, namespace, outcome):
+        with self._lock:
+            counts = self._counts.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                namespace: {
+                    **counts,
+                    "hit_ratio": round(counts["hits"] / (counts["hits"] + counts["misses"]), 4),
+                }
+                for namespace, counts in self._counts.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = CacheStats()
+
+
+# Every entry key embeds its namespace's current generation. Invalidating a
+# namespace swaps the generation, which orphans all of its entries at once; the
+# orphans age out through the backend's TTL and size-bounded culling.
+def _generation(cache, namespace):
+    key = f"{namespace}:generation"
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _invalidate_now(namespaces):
+    cache = caches[CACHE_ALIAS]
+    # The invalidation time travels in the generation; see _cacheable.
+    generation = f"{uuid.uuid4().hex}-{time.time()}"
+    cache.set_many({f"{namespace}:generation": generation for namespace in namespaces}, None)
+
+
+def invalidate(*namespaces):
+    namespaces = namespaces or NAMESPACES
+    _invalidate_now(namespaces)
+    # A concurrent read may repopulate the entry from pre-commit data; drop it
+    # again once the writing transaction is visible.
+    transaction.on_commit(lambda: _invalidate_now(namespaces))
+
+
+async def _ageneration(cache, namespace):
+    key = f"{namespace}:generation"
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _entry_key(namespace, generation, request):
+    digest = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    return f"{namespace}:{generation}:{digest}"
+
+
+# A replica that has not yet replayed the write behind an invalidation would put
+# pre-write data back under the new generation for the full TTL. Replica reads
+# within REPLICA_PIN_SECONDS of the invalidation are served but not cached.
+def _cacheable(generation):
+    if not reading_from_replicas():
+        return True
+    invalidated_at = generation.partition("-")[2]
+    return time.time() - float(invalidated_at or 0) >= settings.REPLICA_PIN_SECONDS
+
+
+def cached_response(namespace, request, compute):
+    cache = caches[CACHE_ALIAS]
+    generation = _generation(cache, namespace)
+    key = _entry_key(namespace, generation, request)
+
+    data = cache.get(key)
+    if data is not None:
+        stats.record(namespace, "hits")
+        return Response(data, headers={"X-Cache": "HIT"})
+
+    stats.record(namespace, "misses")
+    response = compute()
+    if response.status_code == status.HTTP_200_OK and _cacheable(generation):
+        cache.set(key, response.data)
+    response["X-Cache"] = "MISS"
+    return response
+
+
+# Async views build plain Django responses, so compute() returns (status, data)
+# and render() turns that into the response.
+async def acached_response(namespace, request, compute, render):
+    cache = caches[CACHE_ALIAS]
+    generation = await _ageneration(cache, namespace)
+    key = _entry_key(namespace, generation, request)
+
+    data = await cache.aget(key)
+    if data is not None:
+        stats.record(namespace, "hits")
+        return render(data, status.HTTP_200_OK, {"X-Cache": "HIT"})
+
+    stats.record(namespace, "misses")
+    status_code, data = await compute()
+    if status_code == status.HTTP_200_OK and _cacheable(generation):
+        await cache.aset(key, data)
+    return render(data, status_code, {"X-Cache": "MISS"})
+
+
+@receiver(m2m_changed, sender=Patient.clinicians.through)
+def _assignments_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate(BY_DEPARTMENT)
+
+
+@receiver(post_save, sender=Procedure)
+@receiver(post_delete, sender=Procedure)
+def _procedure_changed(sender, **kwargs):
+    invalidate(BY_PROCEDURE, TIMELINE)
+
+
+@receiver(post_save, sender=Patient)
+def _patient_saved(sender, **kwargs):
+    invalidate(BY_PROCEDURE)
+
+
+@receiver(post_delete, sender=Patient)
+def _patient_deleted(sender, **kwargs):
+    # Deleting a patient cascades to its clinician links without m2m_changed.
+    invalidate(BY_PROCEDURE, BY_DEPARTMENT)
+
+
+@receiver(post_save, sender=Clinician)
+@receiver(post_delete, sender=Clinician)
+def _clinician_changed(sender, **kwargs):
+    invalidate(BY_PROCEDURE, BY_DEPARTMENT, TIMELINE)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def _department_changed(sender, **kwargs):
+    invalidate(BY_DEPARTMENT, TIMELINE)
@@ -1,10 +1,13 @@
 from django.db import models
+from ..denormalized import DenormalizedCountersMixin
 from ..departments.models import Department
 
 
-class Clinician(models.Model):
+class Clinician(DenormalizedCountersMixin, models.Model):
     name = models.CharField(max_length=255)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="clinicians")
+    patient_count = models.PositiveIntegerField(default=0, editable=False)
+    procedure_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
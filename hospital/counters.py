@@ -0,0 +1,217 @@
+from collections import Counter, defaultdict
+from django.db.models import Count, F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .departments.models import Department
+from .clinicians.models import Clinician
+from .patients.models import Patient, Procedure
+
+Assignment = Patient.clinicians.through
+COUNTER_FIELDS = ["patient_count", "procedure_count"]
+
+
+def _increment(model, field, deltas):
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def _departments_of(clinician_ids):
+    return dict(Clinician.objects.filter(pk__in=clinician_ids).values_list("id", "department_id"))
+
+
+def _linked_departments(patient_ids, department_ids, exclude_links=()):
+    links = Assignment.objects.filter(
+        patient_id__in=patient_ids, clinician__department_id__in=department_ids
+    ).values_list("patient_id", "clinician_id", "clinician__department_id")
+    return {
+        (patient_id, department_id)
+        for patient_id, clinician_id, department_id in links
+        if (patient_id, clinician_id) not in exclude_links
+    }
+
+
+def _links_changed(links, sign):
+    links = set(links)
+    departments = _departments_of({clinician_id for _, clinician_id in links})
+    links = {(p, c) for p, c in links if c in departments}
+    if not links:
+        return
+
+    clinician_deltas = Counter(clinician_id for _, clinician_id in links)
+    _increment(Clinician, "patient_count", {pk: sign * n for pk, n in clinician_deltas.items()})
+
+    # Department counts are distinct patients: a link only moves the counter
+    # when it is the patient's first link into the department, or the last.
+    changed = {(patient_id, departments[clinician_id]) for patient_id, clinician_id in links}
+    unaffected = _linked_departments(
+        {patient_id for patient_id, _ in changed},
+        set(departments.values()),
+        exclude_links=links if sign > 0 else (),
+    )
+    department_deltas = Counter(department_id for _, department_id in changed - unaffected)
+    _increment(Department, "patient_count", {pk: sign * n for pk, n in department_deltas.items()})
+
+
+def links_added(links):
+    _links_changed(links, 1)
+
+
+def links_removed(links):
+    _links_changed(links, -1)
+
+
+def procedures_changed(clinician_deltas):
+    clinician_deltas = {pk: delta for pk, delta in clinician_deltas.items() if delta}
+    if not clinician_deltas:
+        return
+    departments = _departments_of(clinician_deltas)
+    _increment(Clinician, "procedure_count", clinician_deltas)
+    department_deltas = Counter()
+    for clinician_id, delta in clinician_deltas.items():
+        if clinician_id in departments:
+            department_deltas[departments[clinician_id]] += delta
+    _increment(Department, "procedure_count", department_deltas)
+
+
+def _zero():
+    return dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def clinician_counts():
+    counts = defaultdict(_zero)
+    for row in Assignment.objects.values("clinician_id").annotate(n=Count("patient_id")):
+        counts[row["clinician_id"]]["patient_count"] = row["n"]
+    for row in Procedure.objects.values("clinician_id").annotate(n=Count("id")):
+        counts[row["clinician_id"]]["procedure_count"] = row["n"]
+    return counts
+
+
+def department_counts(department_ids=None):
+    counts = defaultdict(_zero)
+    links, procedures = Assignment.objects.all(), Procedure.objects.all()
+    if department_ids is not None:
+        links = links.filter(clinician__department_id__in=department_ids)
+        procedures = procedures.filter(clinician__department_id__in=department_ids)
+    for row in links.values("clinician__department_id").annotate(
+        n=Count("patient_id", distinct=True)
+    ):
+        counts[row["clinician__department_id"]]["patient_count"] = row["n"]
+    for row in procedures.values("clinician__department_id").annotate(n=Count("id")):
+        counts[row["clinician__department_id"]]["procedure_count"] = row["n"]
+    return counts
+
+
+def refresh_departments(department_ids):
+    department_ids = {pk for pk in department_ids if pk is not None}
+    counts = department_counts(department_ids)
+    for pk in department_ids:
+        Department.objects.filter(pk=pk).update(**counts[pk])
+
+
+def find_drift():
+    drift = []
+    for model, expected in ((Clinician, clinician_counts()), (Department, department_counts())):
+        for row in model.objects.values("id", *COUNTER_FIELDS).iterator():
+            stored = {field: row[field] for field in COUNTER_FIELDS}
+            if stored != expected[row["id"]]:
+                drift.append((model, row["id"], stored, expected[row["id"]]))
+    return drift
+
+
+def repair(drift):
+    for model, pk, _, expected in drift:
+        model.objects.filter(pk=pk).update(**expected)
+
+
+@receiver(m2m_changed, sender=Assignment)
+def _assignments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        lookup = "clinician_id" if reverse else "patient_id"
+        instance._cleared_links = set(
+            Assignment.objects.filter(**{lookup: instance.pk}).values_list(
+                "patient_id", "clinician_id"
+            )
+        )
+    elif action == "post_clear":
+        links_removed(getattr(instance, "_cleared_links", ()))
+    elif action == "pre_remove" and pk_set:
+        # remove() passes the requested ids, linked or not; only existing links count.
+        if reverse:
+            lookup = {"clinician_id": instance.pk, "patient_id__in": pk_set}
+        else:
+            lookup = {"patient_id": instance.pk, "clinician_id__in": pk_set}
+        instance._removed_links = set(
+            Assignment.objects.filter(**lookup).values_list("patient_id", "clinician_id")
+        )
+    elif action == "post_remove":
+        links_removed(getattr(instance, "_removed_links", ()))
+    elif action == "post_add" and pk_set:
+        if reverse:
+            links = {(patient_id, instance.pk) for patient_id in pk_set}
+        else:
+            links = {(instance.pk, clinician_id) for clinician_id in pk_set}
+        links_added(links)
+
+
+@receiver(pre_save, sender=Procedure)
+def _procedure_saving(sender, instance, raw, **kwargs):
+    instance._previous_clinician_id = None
+    if instance.pk is not None and not raw:
+        instance._previous_clinician_id = (
+            Procedure.objects.filter(pk=instance.pk).values_list("clinician_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Procedure)
+def _procedure_saved(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_clinician_id", None)
+    if previous is None:
+        procedures_changed({instance.clinician_id: 1})
+    elif previous != instance.clinician_id:
+        procedures_changed({previous: -1, instance.clinician_id: 1})
+
+
+@receiver(post_delete, sender=Procedure)
+def _procedure_deleted(sender, instance, **kwargs):
+    procedures_changed({instance.clinician_id: -1})
+
+
+@receiver(pre_delete, sender=Patient)
+def _patient_deleting(sender, instance, **kwargs):
+    # Deleting a patient cascades to its clinician links without m2m_changed.
+    instance._deleted_links = set(
+        Assignment.objects.filter(patient_id=instance.pk).values_list("patient_id", "clinician_id")
+    )
+
+
+@receiver(post_delete, sender=Patient)
+def _patient_deleted(sender, instance, **kwargs):
+    links_removed(getattr(instance, "_deleted_links", ()))
+
+
+@receiver(pre_save, sender=Clinician)
+def _clinician_saving(sender, instance, raw, **kwargs):
+    instance._previous_department_id = None
+    if instance.pk is not None and not raw:
+        instance._previous_department_id = (
+            Clinician.objects.filter(pk=instance.pk).values_list("department_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Clinician)
+def _clinician_saved(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_department_id", None)
+    if previous is not None and previous != instance.department_id:
+        refresh_departments({previous, instance.department_id})
+
+
+@receiver(post_delete, sender=Clinician)
+def _clinician_deleted(sender, instance, **kwargs):
+    # The clinician's links cascade away with it, again without m2m_changed.
+    refresh_departments({instance.department_id})
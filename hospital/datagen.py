@@ -0,0 +1,271 @@
+import csv
+import io
+import itertools
+import random
+from datetime import date, timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from .cache import invalidate
+from .counters import find_drift, repair
+from .departments.models import Department
+from .clinicians.models import Clinician
+from .patients.models import Patient, Procedure
+
+DEPARTMENT_NAMES = [
+    "Cardiology",
+    "Surgery",
+    "Pediatrics",
+    "Emergency",
+    "Radiology",
+    "Oncology",
+    "Neurology",
+    "Orthopedics",
+    "Obstetrics",
+    "Dermatology",
+    "Gastroenterology",
+    "Urology",
+    "Psychiatry",
+    "Ophthalmology",
+    "Nephrology",
+]
+FIRST_NAMES = [
+    "James",
+    "Mary",
+    "John",
+    "Patricia",
+    "Robert",
+    "Jennifer",
+    "Michael",
+    "Linda",
+    "David",
+    "Elizabeth",
+    "William",
+    "Barbara",
+    "Richard",
+    "Susan",
+    "Joseph",
+    "Jessica",
+    "Thomas",
+    "Sarah",
+    "Carlos",
+    "Aisha",
+    "Wei",
+    "Priya",
+    "Olga",
+    "Kenji",
+]
+LAST_NAMES = [
+    "Smith",
+    "Johnson",
+    "Williams",
+    "Brown",
+    "Jones",
+    "Garcia",
+    "Miller",
+    "Davis",
+    "Rodriguez",
+    "Martinez",
+    "Wilson",
+    "Anderson",
+    "Taylor",
+    "Thomas",
+    "Moore",
+    "Nguyen",
+    "Patel",
+    "Kim",
+    "Kowalski",
+    "Okafor",
+]
+# Ordered roughly by how often they occur; weights follow a Zipf curve.
+PROCEDURE_NAMES = [
+    "Checkup",
+    "Blood Test",
+    "X-Ray",
+    "Consultation",
+    "Vaccination",
+    "Ultrasound",
+    "MRI Scan",
+    "CT Scan",
+    "ECG",
+    "Physical Therapy",
+    "Endoscopy",
+    "Colonoscopy",
+    "Biopsy",
+    "Cataract Surgery",
+    "Knee Surgery",
+    "Appendectomy",
+    "Heart Surgery",
+    "Hip Replacement",
+    "Chemotherapy",
+    "Dialysis",
+]
+GENDERS = ["F", "M", "O"]
+GENDER_WEIGHTS = [51, 48, 1]
+PROCEDURE_HISTORY_DAYS = 3 * 365
+PROCEDURE_FUTURE_DAYS = 90
+
+
+def zipf_cum_weights(n, exponent=1.1):
+    weights = (1 / rank**exponent for rank in range(1, n + 1))
+    return list(itertools.accumulate(weights))
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def load_rows(table, columns, rows, use_copy):
+    # Model instances and bulk_create cost more than the insert itself at this
+    # volume, so the large tables are written as raw tuples.
+    with connection.cursor() as cursor:
+        if use_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        else:
+            placeholders = ", ".join(["%s"] * len(columns))
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+            )
+
+
+def _create_departments(count):
+    names = [
+        DEPARTMENT_NAMES[i] if i < len(DEPARTMENT_NAMES) else f"Department {i + 1}"
+        for i in range(count)
+    ]
+    return [d.id for d in Department.objects.bulk_create(Department(name=n) for n in names)]
+
+
+def _create_clinicians(rng, count, department_ids, batch_size):
+    # A few large departments employ most clinicians.
+    cum_weights = zipf_cum_weights(len(department_ids), exponent=0.8)
+    clinician_ids = []
+    for batch in _batched(range(count), batch_size):
+        departments = rng.choices(department_ids, cum_weights=cum_weights, k=len(batch))
+        clinicians = Clinician.objects.bulk_create(
+            Clinician(
+                name=f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                department_id=department_id,
+            )
+            for department_id in departments
+        )
+        clinician_ids.extend(c.id for c in clinicians)
+    return clinician_ids
+
+
+def _create_patients(rng, count, batch_size, seed):
+    today = date.today()
+    patient_ids = []
+    for batch in _batched(range(count), batch_size):
+        patients = []
+        for i in batch:
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            patients.append(
+                Patient(
+                    name=f"{first} {last}",
+                    email=f"{first}.{last}.{seed}.{i}@example.org".lower(),
+                    gender=rng.choices(GENDERS, weights=GENDER_WEIGHTS)[0],
+                    date_of_birth=today - timedelta(days=int(rng.triangular(0, 95, 45) * 365)),
+                )
+            )
+        patient_ids.extend(p.id for p in Patient.objects.bulk_create(patients))
+    return patient_ids
+
+
+def _assignment_rows(rng, patient_ids, clinician_ids):
+    # Popular clinicians see disproportionately many patients.
+    cum_weights = zipf_cum_weights(len(clinician_ids))
+    for patient_id in patient_ids:
+        wanted = min(1 + int(rng.expovariate(1.5)), len(clinician_ids))
+        chosen = set(rng.choices(clinician_ids, cum_weights=cum_weights, k=wanted))
+        for clinician_id in chosen:
+            yield (patient_id, clinician_id)
+
+
+def _procedure_rows(rng, count, patient_ids, clinician_ids, now):
+    # A small share of chronic patients accounts for most procedures.
+    patient_weights = list(itertools.accumulate(rng.paretovariate(1.2) for _ in patient_ids))
+    clinician_weights = zipf_cum_weights(len(clinician_ids))
+    name_weights = zipf_cum_weights(len(PROCEDURE_NAMES))
+    history = PROCEDURE_HISTORY_DAYS * 86400
+    future = PROCEDURE_FUTURE_DAYS * 86400
+    for batch in _batched(range(count), 10000):
+        size = len(batch)
+        patients = rng.choices(patient_ids, cum_weights=patient_weights, k=size)
+        clinicians = rng.choices(clinician_ids, cum_weights=clinician_weights, k=size)
+        names = rng.choices(PROCEDURE_NAMES, cum_weights=name_weights, k=size)
+        for patient_id, clinician_id, name in zip(patients, clinicians, names):
+            if rng.random() < 0.1:
+                offset = rng.random() * future
+            else:
+                # Recent history is denser than the distant past.
+                offset = -(rng.random() ** 2) * history
+            yield (name, now + timedelta(seconds=offset), patient_id, clinician_id)
+
+
+# Output is reproducible for a given seed. Departments, clinicians and patients go
+# through bulk_create so their ids come back; the large assignment and procedure
+# tables are loaded with PostgreSQL COPY when available.
+def generate(
+    departments,
+    clinicians,
+    patients,
+    procedures,
+    seed=0,
+    batch_size=5000,
+    use_copy=None,
+    log=lambda message: None,
+):
+    rng = random.Random(seed)
+    if use_copy is None:
+        use_copy = connection.vendor == "postgresql"
+    now = timezone.now()
+    Assignment = Patient.clinicians.through
+
+    with transaction.atomic():
+        department_ids = _create_departments(departments)
+        log(f"departments: {len(department_ids)}")
+        clinician_ids = _create_clinicians(rng, clinicians, department_ids, batch_size)
+        log(f"clinicians: {len(clinician_ids)}")
+        patient_ids = _create_patients(rng, patients, batch_size, seed)
+        log(f"patients: {len(patient_ids)}")
+
+        assignments = 0
+        for batch in _batched(_assignment_rows(rng, patient_ids, clinician_ids), batch_size):
+            load_rows(Assignment._meta.db_table, ["patient_id", "clinician_id"], batch, use_copy)
+            assignments += len(batch)
+        log(f"patient-clinician assignments: {assignments}")
+
+        created = 0
+        adapt = connection.ops.adapt_datetimefield_value
+        timestamp = now if use_copy else adapt(now)
+        rows = _procedure_rows(rng, procedures, patient_ids, clinician_ids, now)
+        for batch in _batched(rows, batch_size):
+            load_rows(
+                Procedure._meta.db_table,
+                ["name", "date", "patient_id", "clinician_id", "created_at", "updated_at"],
+                [
+                    (name, when if use_copy else adapt(when), patient_id, clinician_id)
+                    + (timestamp, timestamp)
+                    for name, when, patient_id, clinician_id in batch
+                ],
+                use_copy,
+            )
+            created += len(batch)
+            log(f"procedures: {created}/{procedures}")
+        repair(find_drift())
+        invalidate()
+
+    return {
+        "departments": len(department_ids),
+        "clinicians": len(clinician_ids),
+        "patients": len(patient_ids),
+        "assignments": assignments,
+        "procedures": created,
+    }
@@ -0,0 +1,13 @@
+class DenormalizedCountersMixin:
+    counter_fields = ("patient_count", "procedure_count")
+
+    def save(self, *args, **kwargs):
+        # Counters are maintained with F() updates by hospital.counters; a full
+        # save of an instance loaded earlier would write back stale values.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -1,8 +1,11 @@
 from django.db import models
+from ..denormalized import DenormalizedCountersMixin
 
 
-class Department(models.Model):
+class Department(DenormalizedCountersMixin, models.Model):
     name = models.CharField(max_length=255)
+    patient_count = models.PositiveIntegerField(default=0, editable=False)
+    procedure_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,157 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("hospital.instrumentation")
+
+_current = ContextVar("request_stats", default=None)
+# Collapse IN lists so "id IN (%s, %s)" and "id IN (%s, %s, %s)" share a fingerprint.
+_PLACEHOLDER_LIST = re.compile(r"\((?:%s, )*%s\)")
+
+
+def fingerprint(sql):
+    return _PLACEHOLDER_LIST.sub("(...)", sql)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.fingerprints = Counter()
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+
+
+def current_stats():
+    return _current.get()
+
+
+# Wrappers go on the calling thread's connections. Async middleware installs
+# them through sync_to_async so they land on the thread the request's ORM
+# calls run on.
+def add_query_wrapper(wrapper):
+    for connection in connections.all():
+        connection.execute_wrappers.append(wrapper)
+
+
+def remove_query_wrapper(wrapper):
+    for connection in connections.all():
+        if wrapper in connection.execute_wrappers:
+            connection.execute_wrappers.remove(wrapper)
+
+
+# Only the outermost serialization is timed, so nested and list serializers are
+# not counted twice.
+@contextmanager
+def timed_serialization():
+    stats = _current.get()
+    if stats is None or stats.serializer_depth:
+        yield
+        return
+    stats.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_seconds += time.perf_counter() - start
+        stats.serializer_depth -= 1
+
+
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+class InstrumentationMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            # Django drops the middleware entirely, so disabled costs nothing.
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        add_query_wrapper(stats.record_query)
+        try:
+            response = self.get_response(request)
+        finally:
+            remove_query_wrapper(stats.record_query)
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        await sync_to_async(add_query_wrapper)(stats.record_query)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_query_wrapper)(stats.record_query)
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - start)
+
+    def _finish(self, request, response, stats, total_seconds):
+        duplicates = stats.duplicates()
+        # Queries run while a streaming response is consumed happen after this
+        # point and are not counted.
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"',
+                f'dupes;desc="{sum(duplicates.values()) - len(duplicates)} duplicate queries"',
+                f"serializer;dur={stats.serializer_seconds * 1000:.2f}",
+                f"total;dur={total_seconds * 1000:.2f}",
+            ]
+        )
+        if (
+            total_seconds * 1000 >= settings.SLOW_REQUEST_MS
+            or stats.queries >= settings.SLOW_REQUEST_QUERIES
+        ):
+            self._log_slow_request(request, response, stats, total_seconds, duplicates)
+        return response
+
+    def _log_slow_request(self, request, response, stats, total_seconds, duplicates):
+        record = {
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "duration_ms": round(total_seconds * 1000, 2),
+            "queries": stats.queries,
+            "db_ms": round(stats.db_seconds * 1000, 2),
+            "serializer_ms": round(stats.serializer_seconds * 1000, 2),
+            "duplicate_queries": [
+                {"sql": sql, "count": count}
+                for sql, count in list(duplicates.items())[: settings.SLOW_REQUEST_DUPLICATES]
+            ],
+        }
+        logger.warning("slow request %s", json.dumps(record), extra={"request_stats": record})
@@ -0,0 +1,120 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from ...benchmark import Scenarios, compare, run_benchmark
+from ...datagen import generate
+from ...rollups.refresh import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and benchmark every API endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=15)
+        parser.add_argument("--clinicians", type=int, default=200)
+        parser.add_argument("--patients", type=int, default=20_000)
+        parser.add_argument("--procedures", type=int, default=200_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=Scenarios.names(),
+            help="Only run this scenario (repeatable)",
+        )
+        parser.add_argument("--output", default="bench_output.json")
+        parser.add_argument("--compare", help="Previous results file to compare against")
+        parser.add_argument(
+            "--existing-db",
+            action="store_true",
+            help="Benchmark the configured database as-is instead of a seeded test database",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Send requests over HTTP to a running server (e.g. http://localhost:8000) "
+            "backed by the configured database; implies --existing-db",
+        )
+        parser.add_argument(
+            "--include-writes",
+            action="store_true",
+            help="Also run the scenarios that create and modify rows against an existing "
+            "database or server (a seeded database always runs them)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Concurrent HTTP clients when --base-url is set",
+        )
+
+    def handle(self, *args, **options):
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        if options["base_url"]:
+            options["existing_db"] = True
+            options["base_url"] = options["base_url"].rstrip("/")
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        writes = not options["existing_db"] or options["include_writes"]
+        requested_writes = sorted(set(options["scenario"] or ()) & Scenarios.WRITES)
+        if requested_writes and not writes:
+            raise CommandError(
+                f"{', '.join(requested_writes)} would modify the existing database; "
+                "pass --include-writes to allow writes"
+            )
+
+        settings.DEBUG = False
+        setup_test_environment()
+        old_name = None
+        try:
+            if not options["existing_db"]:
+                old_name = connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                self.stdout.write("Seeding benchmark database...")
+                generate(
+                    departments=options["departments"],
+                    clinicians=options["clinicians"],
+                    patients=options["patients"],
+                    procedures=options["procedures"],
+                    seed=options["seed"],
+                )
+                refresh_rollups(full=True)
+            report = run_benchmark(
+                requests=options["requests"],
+                warmup=options["warmup"],
+                seed=options["seed"],
+                only=options["scenario"],
+                base_url=options["base_url"],
+                concurrency=options["concurrency"],
+                writes=writes,
+                log=self.stdout.write,
+            )
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report["dataset"] = (
+            None
+            if options["existing_db"]
+            else {
+                key: options[key] for key in ("departments", "clinicians", "patients", "procedures")
+            }
+        )
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if previous:
+            for line in compare(previous, report):
+                self.stdout.write(line)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from ...datagen import generate
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a reproducible synthetic dataset for capacity testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=15)
+        parser.add_argument("--clinicians", type=int, default=500)
+        parser.add_argument("--patients", type=int, default=100_000)
+        parser.add_argument("--procedures", type=int, default=1_000_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Insert with executemany even when PostgreSQL COPY is available",
+        )
+
+    def handle(self, *args, **options):
+        if options["departments"] < 1 or options["clinicians"] < 1 or options["patients"] < 1:
+            raise CommandError("At least one department, clinician and patient is required")
+
+        use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        counts = generate(
+            departments=options["departments"],
+            clinicians=options["clinicians"],
+            patients=options["patients"],
+            procedures=options["procedures"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            use_copy=use_copy,
+            log=lambda message: self.stdout.write(message) if options["verbosity"] > 1 else None,
+        )
+        summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary}"))
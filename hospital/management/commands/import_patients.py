@@ -0,0 +1,89 @@
+import json
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from ...patients.importing import (
+    IMPORT_CHUNK_SIZE,
+    decode_lines,
+    import_records,
+    input_format,
+    read_records,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream patients and their procedures from a CSV or NDJSON export, upserting on email"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for standard input")
+        parser.add_argument(
+            "--input", choices=["csv", "ndjson"], help="Defaults to the file extension"
+        )
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument(
+            "--create-missing",
+            action="store_true",
+            help="Create departments and clinicians that are not found by name",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even when PostgreSQL COPY is available",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive")
+        try:
+            fmt = options["input"] or input_format(path)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        def progress(report):
+            if options["verbosity"] > 0:
+                self.stderr.write(
+                    f"{report.rows} rows: {report.patients_created} patients created, "
+                    f"{report.patients_updated} updated, "
+                    f"{report.procedures_created} procedures, {report.error_count} errors"
+                )
+
+        try:
+            stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        except OSError as exc:
+            raise CommandError(f"Cannot open {path}: {exc.strerror}")
+        try:
+            report = import_records(
+                read_records(decode_lines(stream), fmt),
+                create_missing=options["create_missing"],
+                chunk_size=options["chunk_size"],
+                use_copy=connection.vendor == "postgresql" and not options["no_copy"],
+                progress=progress,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... {report.error_count - len(report.errors)} more errors")
+        summary = ", ".join(
+            f"{getattr(report, field)} {field.replace('_', ' ')}"
+            for field in [
+                "patients_created",
+                "patients_updated",
+                "procedures_created",
+                "assignments_created",
+                "departments_created",
+                "clinicians_created",
+            ]
+        )
+        style = self.style.WARNING if report.error_count else self.style.SUCCESS
+        self.stdout.write(style(f"Imported {report.rows} rows: {summary}"))
+        if report.fatal_error:
+            raise CommandError(
+                f"Stopped at line {report.fatal_error['line']}: {report.fatal_error['error']}"
+            )
@@ -0,0 +1,66 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from ...cache import invalidate
+from ...counters import find_drift, repair
+from ...partitioning import (
+    add_months,
+    drop_partitions_before,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+    partition_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Partition the procedure table by month (PostgreSQL only), create upcoming "
+        "partitions, and optionally drop old ones"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=3,
+            help="Create partitions this many months past the current one (run regularly)",
+        )
+        parser.add_argument(
+            "--drop-before",
+            metavar="YYYY-MM",
+            help="Drop partitions holding only procedures dated before this month",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning needs PostgreSQL")
+        drop_before = None
+        if options["drop_before"]:
+            try:
+                drop_before = datetime.strptime(options["drop_before"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--drop-before must look like YYYY-MM")
+        if options["months_ahead"] < 0:
+            raise CommandError("--months-ahead must not be negative")
+
+        through = add_months(month_start(timezone.now()), options["months_ahead"])
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                self.stdout.write("Converting the procedure table to monthly partitions...")
+                partition_table(cursor, options["months_ahead"])
+            created = ensure_partitions(cursor, through)
+            for name in created:
+                self.stdout.write(f"created {name}")
+
+            if drop_before:
+                dropped = drop_partitions_before(cursor, drop_before)
+                for name in dropped:
+                    self.stdout.write(f"dropped {name}")
+                if dropped:
+                    # Dropped rows bypass the signals that keep counters and caches current.
+                    repair(find_drift())
+                    invalidate()
+
+        self.stdout.write(self.style.SUCCESS("Procedure partitions are up to date"))
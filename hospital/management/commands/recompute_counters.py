@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from ...counters import find_drift, repair
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized clinician/department counters and report drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report drift and exit with an error if any is found",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = find_drift()
+            for model, pk, stored, expected in drift:
+                self.stdout.write(f"{model.__name__} {pk}: stored {stored}, actual {expected}")
+            if options["verify"]:
+                if drift:
+                    raise CommandError(f"{len(drift)} counter rows have drifted")
+            else:
+                repair(drift)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Counters are consistent"))
+        elif not options["verify"]:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drift)} counter rows"))
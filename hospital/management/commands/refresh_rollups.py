@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from ...rollups.refresh import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = "Refresh department rollups for rows changed since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full", action="store_true", help="Recompute every department, not just changed ones"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, refreshing every this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        full = options["full"]
+        while True:
+            refreshed = refresh_rollups(full=full)
+            self.stdout.write(f"refreshed {refreshed} department rollups")
+            if not options["interval"]:
+                break
+            full = False
+            time.sleep(options["interval"])
@@ -0,0 +1,246 @@
+import bisect
+import itertools
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from . import cache
+from .instrumentation import add_query_wrapper, remove_query_wrapper
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+SHARDS = 16
+
+_metrics = []
+# Threads take shard slots round-robin. The slot lives in thread-local storage
+# and goes away with its thread.
+_slots = itertools.count()
+_thread = threading.local()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # A fixed pool of shards, each with its own lock, keeps contention low
+        # without growing with the number of threads (ASGI runs each request
+        # on a fresh one). Shards are summed when metrics are scraped.
+        self._shards = [(threading.Lock(), {}) for _ in range(SHARDS)]
+        _metrics.append(self)
+
+    def _shard(self):
+        slot = getattr(_thread, "slot", None)
+        if slot is None:
+            slot = _thread.slot = next(_slots) % SHARDS
+        return self._shards[slot]
+
+    def _merged(self):
+        merged = {}
+        for lock, shard in self._shards:
+            with lock:
+                values = [(labels, self._copy(value)) for labels, value in shard.items()]
+            for labels, value in values:
+                merged[labels] = self._combine(merged.get(labels), value)
+        return merged
+
+    def _copy(self, value):
+        return value
+
+    def _combine(self, total, value):
+        return (total or 0) + value
+
+    def samples(self):
+        for labels, value in sorted(self._merged().items()):
+            yield self.name + _labels(self.labelnames, labels), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name} {_number(value)}" for name, value in self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        lock, shard = self._shard()
+        with lock:
+            shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        lock, shard = self._shard()
+        with lock:
+            counts = shard.get(labels)
+            if counts is None:
+                # One slot per bucket, one for +Inf, then the running sum.
+                counts = shard[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def _copy(self, value):
+        return list(value)
+
+    def _combine(self, total, value):
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+    def samples(self):
+        for labels, counts in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = (("le", bound if bound == "+Inf" else _number(float(bound))),)
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)}", cumulative
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)}", counts[-1]
+            yield f"{self.name}_count{_labels(self.labelnames, labels)}", cumulative
+
+
+requests_in_flight = Gauge("hospital_http_requests_in_flight", "Requests being processed.")
+request_duration = Histogram(
+    "hospital_http_request_duration_seconds",
+    "Request latency by route.",
+    ["route", "method", "status"],
+)
+query_duration = Histogram(
+    "hospital_db_query_duration_seconds",
+    "SQL query latency by database alias.",
+    ["database"],
+    buckets=QUERY_BUCKETS,
+)
+connections_opened = Counter(
+    "hospital_db_connections_opened_total",
+    "New database connections; a high rate means connections are not being reused.",
+    ["database"],
+)
+
+
+@receiver(connection_created)
+def _connection_created(sender, connection, **kwargs):
+    connections_opened.inc(connection.alias)
+
+
+def _cache_lines():
+    snapshot = cache.stats.snapshot()
+    lines = [
+        "# HELP hospital_cache_requests_total Aggregate cache lookups by outcome.",
+        "# TYPE hospital_cache_requests_total counter",
+    ]
+    for namespace, counts in sorted(snapshot.items()):
+        for key, result in (("hits", "hit"), ("misses", "miss")):
+            labels = _labels(("namespace", "result"), (namespace, result))
+            lines.append(f"hospital_cache_requests_total{labels} {counts[key]}")
+    lines += [
+        "# HELP hospital_cache_hit_ratio Aggregate cache hit ratio since startup.",
+        "# TYPE hospital_cache_hit_ratio gauge",
+    ]
+    for namespace, counts in sorted(snapshot.items()):
+        lines.append(
+            f"hospital_cache_hit_ratio{_labels(('namespace',), (namespace,))} {counts['hit_ratio']}"
+        )
+    return lines
+
+
+def render():
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
+
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    # Route names from the router keep label cardinality bounded; raw paths
+    # would add a series per patient id.
+    return match.view_name if match and match.view_name else "unmatched"
+
+
+class MetricsMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _record_query(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            query_duration.observe(time.perf_counter() - start, context["connection"].alias)
+
+    def _observe(self, request, start, response):
+        status = response.status_code if response is not None else 500
+        request_duration.observe(
+            time.perf_counter() - start, _route(request), request.method, str(status)
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        response = None
+        add_query_wrapper(self._record_query)
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            remove_query_wrapper(self._record_query)
+            requests_in_flight.dec()
+            self._observe(request, start, response)
+
+    async def __acall__(self, request):
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        response = None
+        await sync_to_async(add_query_wrapper)(self._record_query)
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            await sync_to_async(remove_query_wrapper)(self._record_query)
+            requests_in_flight.dec()
+            self._observe(request, start, response)
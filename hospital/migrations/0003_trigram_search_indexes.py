@@ -0,0 +1,37 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ("patient_name_trgm_idx", "hospital_patient", "name"),
+    ("patient_email_trgm_idx", "hospital_patient", "email"),
+    ("procedure_name_trgm_idx", "hospital_procedure", "name"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, table, column in TRIGRAM_INDEXES:
+        # Matches the UPPER("column"::text) expression Django emits for icontains.
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} "
+            f"USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hospital", "0002_patient_created_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0003_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='procedure',
+            index=models.Index(fields=['name', 'date'], name='procedure_name_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procedure',
+            index=models.Index(fields=['date'], name='procedure_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='procedure',
+            index=models.Index(fields=['clinician', 'date'], name='procedure_clinician_date_idx'),
+        ),
+        # Covering index for per-clinician patient counts; Django only creates
+        # (patient_id, clinician_id) and single-column indexes on the M2M table.
+        migrations.RunSQL(
+            'CREATE INDEX patient_clinicians_clinician_patient_idx '
+            'ON hospital_patient_clinicians (clinician_id, patient_id)',
+            'DROP INDEX patient_clinicians_clinician_patient_idx',
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:33
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Clinician = apps.get_model("hospital", "Clinician")
+    Department = apps.get_model("hospital", "Department")
+    Patient = apps.get_model("hospital", "Patient")
+    Procedure = apps.get_model("hospital", "Procedure")
+    Assignment = Patient.clinicians.through
+
+    queries = [
+        (Clinician, "patient_count", Assignment, "clinician_id", Count("patient_id")),
+        (Clinician, "procedure_count", Procedure, "clinician_id", Count("id")),
+        (
+            Department,
+            "patient_count",
+            Assignment,
+            "clinician__department_id",
+            Count("patient_id", distinct=True),
+        ),
+        (Department, "procedure_count", Procedure, "clinician__department_id", Count("id")),
+    ]
+    for model, field, source, group_by, aggregate in queries:
+        for row in source.objects.values(group_by).annotate(n=aggregate):
+            model.objects.filter(pk=row[group_by]).update(**{field: row["n"]})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hospital", "0004_procedure_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="clinician",
+            name="patient_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="clinician",
+            name="procedure_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="department",
+            name="patient_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="department",
+            name="procedure_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hospital", "0005_denormalized_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resource",
+                    models.CharField(
+                        choices=[("patient", "Patient"), ("procedure", "Procedure")],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="patient",
+            index=models.Index(fields=["updated_at", "id"], name="patient_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="procedure",
+            index=models.Index(fields=["updated_at", "id"], name="procedure_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["resource", "deleted_at", "id"],
+                name="tombstone_resource_deleted_idx",
+            ),
+        ),
+    ]
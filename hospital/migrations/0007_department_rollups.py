@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hospital", "0006_change_feed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DepartmentRollup",
+            fields=[
+                (
+                    "department",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rollup",
+                        serialize=False,
+                        to="hospital.department",
+                    ),
+                ),
+                ("patient_count", models.PositiveIntegerField(default=0)),
+                ("procedure_count", models.PositiveIntegerField(default=0)),
+                ("procedure_name_count", models.PositiveIntegerField(default=0)),
+                ("last_procedure_date", models.DateTimeField(null=True)),
+                ("refreshed_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("through", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hospital", "0007_department_rollups"),
+    ]
+
+    # Procedure names are only filtered with icontains, which a btree cannot
+    # serve; procedure_name_trgm_idx from 0003 does.
+    operations = [
+        migrations.RemoveIndex(
+            model_name="procedure",
+            name="procedure_name_date_idx",
+        ),
+    ]
@@ -1,5 +1,15 @@
 from .departments.models import Department
 from .clinicians.models import Clinician
 from .patients.models import Patient, Procedure
+from .rollups.models import DepartmentRollup, RollupWatermark
+from .sync.models import Tombstone
 
-__all__ = ["Department", "Clinician", "Patient", "Procedure"]
+__all__ = [
+    "Department",
+    "Clinician",
+    "Patient",
+    "Procedure",
+    "Tombstone",
+    "DepartmentRollup",
+    "RollupWatermark",
+]
@@ -0,0 +1,142 @@
+import re
+from datetime import date
+from django.utils import timezone
+from .patients.models import Procedure
+from .sync.models import Tombstone
+
+TABLE = Procedure._meta.db_table
+UNPARTITIONED = f"{TABLE}_unpartitioned"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def month_starts(first, last):
+    months, month = [], month_start(first)
+    while month <= month_start(last):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name):
+    match = _PARTITION_NAME.match(name)
+    return match and date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def create_partition_sql(month):
+    # Bounds are UTC midnights; the upper bound is exclusive.
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def partitions(cursor):
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s) ORDER BY child.relname",
+        [TABLE],
+    )
+    return [name for (name,) in cursor.fetchall()]
+
+
+# Months must have their partition before rows arrive, or the rows land in the
+# default partition, which then blocks creating that month's partition.
+def ensure_partitions(cursor, through):
+    created = []
+    existing = set(partitions(cursor))
+    for month in month_starts(timezone.now(), through):
+        if partition_name(month) not in existing:
+            cursor.execute(create_partition_sql(month))
+            created.append(partition_name(month))
+    return created
+
+
+# Rebuilds hospital_procedure as a table range-partitioned by month on date and
+# copies the rows over, all in the caller's transaction. PostgreSQL requires
+# the partition key in the primary key, so it becomes (id, date); ids stay
+# unique through the identity sequence. A lookup by id alone, such as
+# Procedure.objects.get(pk=...), cannot be pruned and probes the (id, date)
+# index of every partition. Indexes and foreign keys are recreated from the old
+# table's definitions.
+def partition_table(cursor, months_ahead):
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+        [TABLE],
+    )
+    indexes = [definition for (definition,) in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{UNPARTITIONED}"')
+    cursor.execute(
+        f'CREATE TABLE "{TABLE}" (LIKE "{UNPARTITIONED}" INCLUDING DEFAULTS '
+        "INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE (date)"
+    )
+    cursor.execute(f'ALTER TABLE "{TABLE}" ADD PRIMARY KEY (id, date)')
+    cursor.execute(f'SELECT min(date), max(date) FROM "{UNPARTITIONED}"')
+    first, last = cursor.fetchone()
+    now = timezone.now()
+    through = add_months(month_start(max(last or now, now)), months_ahead)
+    for month in month_starts(first or now, through):
+        cursor.execute(create_partition_sql(month))
+    cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{UNPARTITIONED}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+        f'COALESCE((SELECT max(id) FROM "{TABLE}"), 1))'
+    )
+    cursor.execute(f'DROP TABLE "{UNPARTITIONED}"')
+
+    # The definitions were read before the rename, so they name the new table.
+    for definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+    cursor.execute(f'ANALYZE "{TABLE}"')
+
+
+# Retention: drops whole month partitions that end on or before `before`,
+# leaving tombstones so change-feed consumers see the deletes.
+def drop_partitions_before(cursor, before):
+    dropped = []
+    for name in partitions(cursor):
+        month = partition_month(name)
+        if not month or add_months(month, 1) > before:
+            continue
+        cursor.execute(
+            f'INSERT INTO "{Tombstone._meta.db_table}" (resource, object_id, deleted_at) '
+            f'SELECT %s, id, %s FROM "{name}"',
+            [Tombstone.PROCEDURE, timezone.now()],
+        )
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        cursor.execute(f'DROP TABLE "{name}"')
+        dropped.append(name)
+    return dropped
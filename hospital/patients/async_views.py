@@ -0,0 +1,194 @@
+import asyncio
+import functools
+from contextlib import ExitStack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .models import Patient, Procedure
+from .rendering import FastJSONRenderer
+from .search import TrigramSearchFilter
+from .serializers import PATIENT_PLAN, PatientSerializer
+from .views import PatientViewSet, _by_procedure_row, _clinician_count_rows, _parse_department_ids
+from ..cache import BY_DEPARTMENT, BY_PROCEDURE, acached_response
+
+_renderer = FastJSONRenderer()
+
+
+def _json(data, status_code=status.HTTP_200_OK, headers=None):
+    # Rendered like the DRF views so both variants return identical bodies.
+    return HttpResponse(
+        _renderer.render(data),
+        status=status_code,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def _get_only(view):
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return _json(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+# Executor threads never see request_started/finished, so each call does the
+# same housekeeping itself: the thread keeps one persistent connection, replaced
+# once it errors or outlives CONN_MAX_AGE. The request's execute wrappers
+# (instrumentation, metrics) are installed on it for the duration.
+def _on_own_connection(function, wrappers):
+    def run():
+        connection.close_if_unusable_or_obsolete()
+        try:
+            with ExitStack() as stack:
+                for wrapper in wrappers:
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+                return function()
+        finally:
+            connection.close_if_unusable_or_obsolete()
+
+    return run
+
+
+def _request_wrappers():
+    # None inside a transaction, whose queries must stay on its connection.
+    return None if connection.in_atomic_block else list(connection.execute_wrappers)
+
+
+# Django 4.2's async ORM sends every call of a request to one thread and
+# connection, so awaiting several of them together still runs them one after
+# another. Outside a transaction on PostgreSQL, independent queries instead run
+# on executor threads, each on a connection of its own.
+async def _concurrently(*functions):
+    if connection.vendor == "postgresql" and settings.ASYNC_CONCURRENT_QUERIES:
+        wrappers = await sync_to_async(_request_wrappers)()
+        if wrappers is not None:
+            return await asyncio.gather(
+                *(
+                    sync_to_async(_on_own_connection(f, wrappers), thread_sensitive=False)()
+                    for f in functions
+                )
+            )
+    return [await sync_to_async(function)() for function in functions]
+
+
+# Mirrors PageNumberPagination: same parameters, links and error for a page
+# past the end, with the count and the page rows fetched concurrently.
+async def _paginate(request, queryset, build_rows):
+    try:
+        number = int(request.GET.get("page", 1))
+        if number < 1:
+            raise ValueError
+    except ValueError:
+        return status.HTTP_404_NOT_FOUND, {"detail": "Invalid page."}
+
+    size = api_settings.PAGE_SIZE
+    offset = (number - 1) * size
+    count, page = await _concurrently(
+        queryset.count, lambda: list(queryset[offset : offset + size])
+    )
+    if number > 1 and not page:
+        return status.HTTP_404_NOT_FOUND, {"detail": "Invalid page."}
+
+    url = request.build_absolute_uri()
+    if number == 1:
+        previous = None
+    elif number == 2:
+        previous = remove_query_param(url, "page")
+    else:
+        previous = replace_query_param(url, "page", number - 1)
+    return status.HTTP_200_OK, {
+        "count": count,
+        "next": replace_query_param(url, "page", number + 1) if offset + size < count else None,
+        "previous": previous,
+        "results": await build_rows(page),
+    }
+
+
+async def _serialize_patients(page):
+    return PATIENT_PLAN.serialize(page)
+
+
+@_get_only
+async def patient_list(request):
+    patients = (
+        TrigramSearchFilter()
+        .filter_queryset(Request(request), PatientViewSet.queryset.all(), PatientViewSet)
+        .values(*PATIENT_PLAN.sources)
+    )
+    status_code, data = await _paginate(request, patients, _serialize_patients)
+    return _json(data, status_code)
+
+
+@_get_only
+async def patient_detail(request, pk):
+    try:
+        patient = await Patient.objects.aget(pk=pk)
+    except Patient.DoesNotExist:
+        return _json({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+    return _json(PatientSerializer(patient).data)
+
+
+async def _patients_by_procedure(request, procedure_name):
+    matching = Procedure.objects.filter(name__icontains=procedure_name)
+    patients = Patient.objects.filter(id__in=matching.values("patient_id")).order_by("id")
+
+    # aiterator() cannot prefetch in Django 4.2, so the page's procedures are
+    # fetched in one follow-up query and attached by hand.
+    async def build_rows(page):
+        procedures = {}
+        async for procedure in (
+            matching.filter(patient_id__in=[patient.id for patient in page])
+            .select_related("clinician")
+            .order_by("id")
+            .aiterator()
+        ):
+            procedures.setdefault(procedure.patient_id, []).append(procedure)
+        for patient in page:
+            patient.matching_procedures = procedures.get(patient.id, [])
+        return [_by_procedure_row(patient) for patient in page]
+
+    return await _paginate(request, patients, build_rows)
+
+
+@_get_only
+async def patients_by_procedure(request):
+    procedure_name = request.GET.get("procedure_name")
+    if not procedure_name:
+        return _json({"error": "procedure_name parameter required"}, status.HTTP_400_BAD_REQUEST)
+    return await acached_response(
+        BY_PROCEDURE,
+        request,
+        lambda: _patients_by_procedure(request, procedure_name),
+        _json,
+    )
+
+
+async def _patient_counts(department_ids):
+    # Counts are stored on the clinician rows, so every requested department
+    # comes back from one indexed query rather than one query per department.
+    result = await sync_to_async(_clinician_count_rows)(department_ids)
+    if department_ids and not result:
+        return status.HTTP_404_NOT_FOUND, {"error": "Department not found"}
+    return status.HTTP_200_OK, result
+
+
+@_get_only
+async def patient_counts_by_department(request):
+    try:
+        department_ids = _parse_department_ids(Request(request))
+    except ValueError:
+        return _json({"error": "Invalid department_id"}, status.HTTP_400_BAD_REQUEST)
+    return await acached_response(
+        BY_DEPARTMENT, request, lambda: _patient_counts(department_ids), _json
+    )
@@ -0,0 +1,115 @@
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from .models import Patient, Procedure
+from .serializers import BulkPatientSerializer, BulkProcedureSerializer
+from ..cache import BY_PROCEDURE, TIMELINE, invalidate
+from ..clinicians.models import Clinician
+from ..counters import procedures_changed
+
+BATCH_SIZE = 1000
+PATIENT_FIELDS = ["name", "gender", "email", "date_of_birth"]
+
+
+def _validate_items(serializer_class, items):
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+    return valid, errors
+
+
+def upsert_patients(items):
+    valid, errors = _validate_items(BulkPatientSerializer, items)
+
+    existing = Patient.objects.in_bulk({data["id"] for _, data in valid if "id" in data})
+    email_owners = dict(
+        Patient.objects.filter(email__in=[data["email"] for _, data in valid]).values_list(
+            "email", "id"
+        )
+    )
+
+    patients, to_create, to_update, seen_emails = [], [], [], set()
+    for index, data in valid:
+        patient_id = data.pop("id", None)
+        if patient_id is not None and patient_id not in existing:
+            errors.append({"index": index, "errors": {"id": ["Patient not found."]}})
+            continue
+        owner = email_owners.get(data["email"])
+        if data["email"] in seen_emails or owner not in (None, patient_id):
+            errors.append(
+                {"index": index, "errors": {"email": ["patient with this email already exists."]}}
+            )
+            continue
+        seen_emails.add(data["email"])
+
+        if patient_id is None:
+            patient = Patient(**data)
+            to_create.append(patient)
+        else:
+            patient = existing[patient_id]
+            for field, value in data.items():
+                setattr(patient, field, value)
+            to_update.append(patient)
+        patients.append(patient)
+
+    if errors:
+        return [], sorted(errors, key=lambda error: error["index"])
+
+    now = timezone.now()
+    for patient in to_update:
+        patient.updated_at = now
+    with transaction.atomic():
+        Patient.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        Patient.objects.bulk_update(
+            to_update, PATIENT_FIELDS + ["updated_at"], batch_size=BATCH_SIZE
+        )
+    # bulk_create/bulk_update bypass the model signals behind invalidation and counters.
+    invalidate(BY_PROCEDURE)
+    return patients, []
+
+
+def create_procedures(items):
+    valid, errors = _validate_items(BulkProcedureSerializer, items)
+
+    patient_ids = set(
+        Patient.objects.filter(id__in={data["patient"] for _, data in valid}).values_list(
+            "id", flat=True
+        )
+    )
+    clinician_ids = set(
+        Clinician.objects.filter(id__in={data["clinician"] for _, data in valid}).values_list(
+            "id", flat=True
+        )
+    )
+
+    procedures = []
+    for index, data in valid:
+        item_errors = {}
+        if data["patient"] not in patient_ids:
+            item_errors["patient"] = ["Patient not found."]
+        if data["clinician"] not in clinician_ids:
+            item_errors["clinician"] = ["Clinician not found."]
+        if item_errors:
+            errors.append({"index": index, "errors": item_errors})
+            continue
+        procedures.append(
+            Procedure(
+                name=data["name"],
+                date=data["date"],
+                patient_id=data["patient"],
+                clinician_id=data["clinician"],
+            )
+        )
+
+    if errors:
+        return [], sorted(errors, key=lambda error: error["index"])
+
+    with transaction.atomic():
+        Procedure.objects.bulk_create(procedures, batch_size=BATCH_SIZE)
+        procedures_changed(Counter(procedure.clinician_id for procedure in procedures))
+    invalidate(BY_PROCEDURE, TIMELINE)
+    return procedures, []
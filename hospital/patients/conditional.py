@@ -0,0 +1,47 @@
+import hashlib
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def _etag(*parts):
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    # Derived from row metadata rather than the body bytes, hence weak.
+    return f'W/"{digest}"'
+
+
+# A page changes when one of its rows is updated (MAX(updated_at) moves), when
+# rows enter or leave it (the id list), or when its links change (the total
+# count, or has_next/has_previous for cursor pages). Rows are .values() dicts.
+def list_etag(request, rows, page_state):
+    return _etag(
+        max((row["updated_at"] for row in rows), default=None),
+        ",".join(str(row["id"]) for row in rows),
+        page_state,
+        request.accepted_renderer.format,
+        request.get_full_path(),
+    )
+
+
+def detail_etag(request, instance):
+    return _etag(
+        instance.pk,
+        instance.updated_at.isoformat(),
+        request.accepted_renderer.format,
+        request.get_full_path(),
+    )
+
+
+# Lists only send an ETag: a deleted row can move a page's newest updated_at
+# backwards, which If-Modified-Since cannot detect. HTTP dates have one-second
+# resolution, so clients should prefer If-None-Match.
+def conditional_response(request, etag, last_modified, respond):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = respond()
+    if response.status_code in (200, 304):
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,74 @@
+from collections import defaultdict
+from .models import Patient, Procedure
+from .serializers import (
+    PATIENT_PROCEDURE_PLAN,
+    ClinicianSummarySerializer,
+    ClinicianWithDepartmentSerializer,
+)
+
+Assignment = Patient.clinicians.through
+EXPANSIONS = ["clinicians", "clinicians.department", "procedures"]
+
+
+def _split(value):
+    return [item for item in (part.strip() for part in value.split(",")) if item]
+
+
+def parse_fields(params, allowed):
+    if "fields" not in params:
+        return None
+    fields = _split(params["fields"])
+    if not fields or not set(fields) <= set(allowed):
+        raise ValueError(f"fields must be a comma-separated subset of: {', '.join(allowed)}")
+    return fields
+
+
+def parse_expand(params):
+    expand = set(_split(params.get("expand", "")))
+    if not expand <= set(EXPANSIONS):
+        raise ValueError(f"expand must be a comma-separated subset of: {', '.join(EXPANSIONS)}")
+    if "clinicians.department" in expand:
+        expand.add("clinicians")
+    return expand
+
+
+def _clinicians_by_patient(patient_ids, with_department):
+    serializer = (
+        ClinicianWithDepartmentSerializer if with_department else ClinicianSummarySerializer
+    )
+    links = (
+        Assignment.objects.filter(patient_id__in=patient_ids)
+        .select_related("clinician__department" if with_department else "clinician")
+        .order_by("clinician_id")
+    )
+    clinicians = defaultdict(list)
+    for link in links:
+        clinicians[link.patient_id].append(serializer(link.clinician).data)
+    return clinicians
+
+
+def _procedures_by_patient(patient_ids):
+    # Heavy patients can have hundreds of procedures, so they are read as rows.
+    rows = list(
+        Procedure.objects.filter(patient_id__in=patient_ids)
+        .order_by("id")
+        .values("patient_id", *PATIENT_PROCEDURE_PLAN.sources)
+    )
+    procedures = defaultdict(list)
+    for row, record in zip(rows, PATIENT_PROCEDURE_PLAN.serialize(rows)):
+        procedures[row["patient_id"]].append(record)
+    return procedures
+
+
+# Adds the requested relations to serialized patient records with one query
+# per relation for the whole page.
+def expand_records(records, patient_ids, expand):
+    if "clinicians" in expand:
+        clinicians = _clinicians_by_patient(patient_ids, "clinicians.department" in expand)
+        for record, patient_id in zip(records, patient_ids):
+            record["clinicians"] = clinicians.get(patient_id, [])
+    if "procedures" in expand:
+        procedures = _procedures_by_patient(patient_ids)
+        for record, patient_id in zip(records, patient_ids):
+            record["procedures"] = procedures.get(patient_id, [])
+    return records
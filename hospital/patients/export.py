@@ -0,0 +1,110 @@
+import csv
+import itertools
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
+from rest_framework.fields import DateTimeField
+from .models import Patient, Procedure
+from .rendering import dumps
+from .serializers import PATIENT_PLAN, PatientSerializer
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+PROCEDURE_COLUMNS = [
+    "procedure_id",
+    "procedure_name",
+    "procedure_date",
+    "clinician_id",
+    "clinician_name",
+    "department_name",
+]
+
+_datetime_field = DateTimeField()
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _parse_timestamp(value, name):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"Invalid {name}")
+    return parsed
+
+
+def export_queryset(params, include_procedures=False):
+    patients = Patient.objects.order_by("id")
+    if params.get("updated_after"):
+        patients = patients.filter(
+            updated_at__gt=_parse_timestamp(params["updated_after"], "updated_after")
+        )
+    if params.get("updated_before"):
+        patients = patients.filter(
+            updated_at__lte=_parse_timestamp(params["updated_before"], "updated_before")
+        )
+    if params.get("department_id"):
+        try:
+            department_ids = [int(value) for value in params["department_id"].split(",") if value]
+        except ValueError:
+            raise ValueError("Invalid department_id")
+        patients = patients.filter(
+            id__in=Patient.clinicians.through.objects.filter(
+                clinician__department_id__in=department_ids
+            ).values("patient_id")
+        )
+    if include_procedures:
+        procedures = Procedure.objects.select_related("clinician__department").order_by("id")
+        patients = patients.prefetch_related(Prefetch("procedures", queryset=procedures))
+    return patients
+
+
+def _procedure_record(procedure):
+    return {
+        "procedure_id": procedure.id,
+        "procedure_name": procedure.name,
+        "procedure_date": _datetime_field.to_representation(procedure.date),
+        "clinician_id": procedure.clinician_id,
+        "clinician_name": procedure.clinician.name,
+        "department_name": procedure.clinician.department.name,
+    }
+
+
+# Yields (record, procedures) pairs; procedures is None when not included.
+# Without procedures no model instances are built: rows come from .values()
+# and are serialized a chunk at a time through PATIENT_PLAN.
+def _patient_records(patients, include_procedures):
+    if include_procedures:
+        for patient in patients.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            (record,) = PATIENT_PLAN.serialize([vars(patient)])
+            yield record, patient.procedures.all()
+        return
+    rows = patients.values(*PATIENT_PLAN.sources).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while chunk := list(itertools.islice(rows, EXPORT_CHUNK_SIZE)):
+        for record in PATIENT_PLAN.serialize(chunk):
+            yield record, None
+
+
+def iter_ndjson(patients, include_procedures=False):
+    for record, procedures in _patient_records(patients, include_procedures):
+        if procedures is not None:
+            record["procedures"] = [_procedure_record(p) for p in procedures]
+        # NDJSON is not embedded in JavaScript, so U+2028/U+2029 stay unescaped.
+        yield dumps(record, escape_line_separators=False) + b"\n"
+
+
+def iter_csv(patients, include_procedures=False):
+    writer = csv.writer(_Echo())
+    patient_columns = PatientSerializer.Meta.fields
+    columns = patient_columns + PROCEDURE_COLUMNS if include_procedures else patient_columns
+    yield writer.writerow(columns)
+    for record, procedures in _patient_records(patients, include_procedures):
+        row = [record[column] for column in patient_columns]
+        if procedures is None:
+            yield writer.writerow(row)
+            continue
+        if not procedures:
+            yield writer.writerow(row + [""] * len(PROCEDURE_COLUMNS))
+        for procedure in procedures:
+            record = _procedure_record(procedure)
+            yield writer.writerow(row + [record[column] for column in PROCEDURE_COLUMNS])
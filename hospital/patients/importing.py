@@ -0,0 +1,413 @@
+import codecs
+import csv
+import itertools
+import json
+from collections import Counter
+from pathlib import Path
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .bulk import BATCH_SIZE, PATIENT_FIELDS
+from .export import PROCEDURE_COLUMNS
+from .models import Patient, Procedure
+from .serializers import ImportPatientSerializer, ImportProcedureSerializer
+from ..cache import invalidate
+from ..clinicians.models import Clinician
+from ..counters import Assignment, links_added, procedures_changed
+from ..datagen import load_rows
+from ..departments.models import Department
+
+IMPORT_CHUNK_SIZE = 2000
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+MAX_REPORTED_ERRORS = 100
+PATIENT_STAGING = "import_patient_staging"
+PROCEDURE_STAGING = "import_procedure_staging"
+UPSERT_FIELDS = ["name", "gender", "date_of_birth", "updated_at"]
+
+
+class ImportReport:
+    COUNTS = [
+        "rows",
+        "patients_created",
+        "patients_updated",
+        "procedures_created",
+        "assignments_created",
+        "departments_created",
+        "clinicians_created",
+        "error_count",
+    ]
+
+    def __init__(self):
+        self.rows = 0
+        self.patients_created = 0
+        self.patients_updated = 0
+        self.procedures_created = 0
+        self.assignments_created = 0
+        self.departments_created = 0
+        self.clinicians_created = 0
+        self.error_count = 0
+        self.errors = []
+        self.fatal_error = None
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        # Only the first errors are kept, so a bad file cannot exhaust memory.
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def merge(self, other):
+        for field in self.COUNTS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.errors.extend(other.errors[: MAX_REPORTED_ERRORS - len(self.errors)])
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+# Departments and clinicians are few enough to hold in memory. Names are not
+# unique, so the oldest row with a name wins. Creations are counted on report,
+# which import_records points at the current chunk's counts.
+class ClinicianLookup:
+    def __init__(self, report, create_missing=False):
+        self.report = report
+        self.create_missing = create_missing
+        self.departments = {}
+        for pk, name in Department.objects.order_by("id").values_list("id", "name"):
+            self.departments.setdefault(name, pk)
+        self.clinicians = {}
+        for pk, department_id, name in Clinician.objects.order_by("id").values_list(
+            "id", "department_id", "name"
+        ):
+            self.clinicians.setdefault((department_id, name), pk)
+
+    def clinician_id(self, department_name, clinician_name):
+        department_id = self.departments.get(department_name)
+        if department_id is None:
+            if not self.create_missing:
+                raise ValidationError({"department_name": ["Department not found."]})
+            department_id = Department.objects.create(name=department_name).pk
+            self.departments[department_name] = department_id
+            self.report.departments_created += 1
+
+        key = (department_id, clinician_name)
+        if key not in self.clinicians:
+            if not self.create_missing:
+                raise ValidationError({"clinician_name": ["Clinician not found in department."]})
+            self.clinicians[key] = Clinician.objects.create(
+                name=clinician_name, department_id=department_id
+            ).pk
+            self.report.clinicians_created += 1
+        return self.clinicians[key]
+
+
+def input_format(filename):
+    try:
+        return IMPORT_FORMATS[Path(filename).suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Cannot tell the format of {filename!r}; use input=csv|ndjson")
+
+
+# A file that cannot be read past some line. Rows before it are still imported.
+class ReadError(ValueError):
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def decode_lines(lines):
+    line_number = 1
+    try:
+        # A BOM at the start of a spreadsheet export is dropped.
+        for line in codecs.iterdecode(lines, "utf-8-sig"):
+            yield line
+            line_number += line.count("\n")
+    except UnicodeDecodeError as exc:
+        raise ReadError(line_number, f"Not valid UTF-8: {exc.reason}")
+
+
+# Records are (line number, dict) pairs in the export layout: patient fields
+# plus a "procedures" list. A CSV row carries at most one procedure, so a
+# patient with several procedures repeats over consecutive rows.
+def csv_records(lines):
+    reader = csv.DictReader(lines)
+    try:
+        columns = reader.fieldnames or []
+    except csv.Error as exc:
+        raise ReadError(reader.reader.line_num, str(exc))
+    missing = [column for column in PATIENT_FIELDS if column not in columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    with_procedures = "procedure_name" in columns
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            raise ReadError(reader.reader.line_num, str(exc))
+        procedures = []
+        if with_procedures and row.get("procedure_name"):
+            procedures.append({column: row.get(column) for column in PROCEDURE_COLUMNS})
+        yield reader.line_num, {**row, "procedures": procedures}
+
+
+def ndjson_records(lines):
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record
+
+
+def read_records(lines, input_format):
+    if input_format == "csv":
+        return csv_records(lines)
+    if input_format == "ndjson":
+        return ndjson_records(lines)
+    raise ValueError("input must be one of: csv, ndjson")
+
+
+# Serializers are built once per import and reused through run_validation, as
+# DRF does for nested data; building their fields costs more than validating.
+class RecordValidator:
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.patient_serializer = ImportPatientSerializer()
+        self.procedure_serializer = ImportProcedureSerializer()
+        self.patients = {}
+
+    def validate(self, record):
+        if not isinstance(record, dict):
+            raise ValidationError({"non_field_errors": ["Expected a JSON object."]})
+        # CSV rows repeat the patient for every procedure; validate it once.
+        key = tuple(repr(record.get(field)) for field in PATIENT_FIELDS)
+        patient = self.patients.get(key)
+        if patient is None:
+            patient = self.patients[key] = self.patient_serializer.run_validation(record)
+
+        items = record.get("procedures") or []
+        if not isinstance(items, list):
+            raise ValidationError({"procedures": ["Expected a list."]})
+        procedures = []
+        for index, item in enumerate(items):
+            try:
+                data = self.procedure_serializer.run_validation(item)
+                clinician_id = self.lookup.clinician_id(
+                    data["department_name"], data["clinician_name"]
+                )
+            except ValidationError as exc:
+                raise ValidationError({"procedures": {index: exc.detail}})
+            procedures.append((data["procedure_name"], data["procedure_date"], clinician_id))
+        return patient, procedures
+
+
+def _bulk_upsert_patients(patients, report):
+    existing = {
+        email: (pk, values)
+        for pk, email, *values in Patient.objects.filter(email__in=list(patients)).values_list(
+            "id", "email", "name", "gender", "date_of_birth"
+        )
+    }
+    # Unchanged patients are left alone so their updated_at, and the change
+    # feed, only move for real edits.
+    changed = []
+    for email, data in patients.items():
+        if email not in existing:
+            report.patients_created += 1
+        elif existing[email][1] != [data["name"], data["gender"], data["date_of_birth"]]:
+            report.patients_updated += 1
+        else:
+            continue
+        changed.append(Patient(**data))
+    Patient.objects.bulk_create(
+        changed,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["email"],
+        update_fields=UPSERT_FIELDS,
+    )
+
+    ids = {email: pk for email, (pk, _) in existing.items()}
+    new = [email for email in patients if email not in ids]
+    ids.update(Patient.objects.filter(email__in=new).values_list("email", "id"))
+    return ids
+
+
+def _copy_upsert_patients(patients, report, now):
+    table = Patient._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {PATIENT_STAGING} "
+            "(name varchar(255), email varchar(254), gender varchar(1), date_of_birth date)"
+        )
+        cursor.execute(f"TRUNCATE {PATIENT_STAGING}")
+    load_rows(
+        PATIENT_STAGING,
+        PATIENT_FIELDS,
+        ([data[field] for field in PATIENT_FIELDS] for data in patients.values()),
+        use_copy=True,
+    )
+    with connection.cursor() as cursor:
+        # xmax is 0 only on freshly inserted rows; unchanged rows are skipped by
+        # the WHERE clause and not returned at all.
+        cursor.execute(
+            f'INSERT INTO "{table}" AS patient '
+            "(name, email, gender, date_of_birth, created_at, updated_at) "
+            f"SELECT name, email, gender, date_of_birth, %s, %s FROM {PATIENT_STAGING} "
+            "ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name, gender = EXCLUDED.gender, "
+            "date_of_birth = EXCLUDED.date_of_birth, updated_at = EXCLUDED.updated_at "
+            "WHERE (patient.name, patient.gender, patient.date_of_birth) IS DISTINCT FROM "
+            "(EXCLUDED.name, EXCLUDED.gender, EXCLUDED.date_of_birth) "
+            "RETURNING xmax = 0",
+            [now, now],
+        )
+        inserted = Counter(created for (created,) in cursor.fetchall())
+        report.patients_created += inserted[True]
+        report.patients_updated += inserted[False]
+        cursor.execute(
+            f'SELECT patient.email, patient.id FROM "{table}" patient '
+            f"JOIN {PATIENT_STAGING} staging ON staging.email = patient.email"
+        )
+        return dict(cursor.fetchall())
+
+
+# Procedures have no natural key; one with the same patient, clinician, name
+# and date is taken to be already imported, so re-running a file is harmless.
+def _bulk_insert_procedures(rows):
+    existing = set(
+        Procedure.objects.filter(patient_id__in={row[2] for row in rows}).values_list(
+            "name", "date", "patient_id", "clinician_id"
+        )
+    )
+    procedures = [
+        Procedure(name=name, date=date, patient_id=patient_id, clinician_id=clinician_id)
+        for name, date, patient_id, clinician_id in sorted(
+            rows - existing, key=lambda row: (row[2], row[1], row[0], row[3])
+        )
+    ]
+    Procedure.objects.bulk_create(procedures, batch_size=BATCH_SIZE)
+    return [procedure.clinician_id for procedure in procedures]
+
+
+def _copy_insert_procedures(rows, now):
+    table = Procedure._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {PROCEDURE_STAGING} "
+            "(name varchar(255), date timestamptz, patient_id bigint, clinician_id bigint)"
+        )
+        cursor.execute(f"TRUNCATE {PROCEDURE_STAGING}")
+    load_rows(
+        PROCEDURE_STAGING, ["name", "date", "patient_id", "clinician_id"], rows, use_copy=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{table}" (name, date, patient_id, clinician_id, created_at, updated_at) '
+            f"SELECT name, date, patient_id, clinician_id, %s, %s FROM {PROCEDURE_STAGING} staging "
+            f'WHERE NOT EXISTS (SELECT 1 FROM "{table}" existing '
+            "WHERE existing.patient_id = staging.patient_id "
+            "AND existing.clinician_id = staging.clinician_id "
+            "AND existing.date = staging.date AND existing.name = staging.name) "
+            "ORDER BY patient_id, date RETURNING clinician_id",
+            [now, now],
+        )
+        return [clinician_id for (clinician_id,) in cursor.fetchall()]
+
+
+# A patient with a procedure by a clinician becomes that clinician's patient.
+def _link(links, now):
+    existing = set(
+        Assignment.objects.filter(patient_id__in={p for p, _ in links}).values_list(
+            "patient_id", "clinician_id"
+        )
+    )
+    new = sorted(links - existing)
+    Assignment.objects.bulk_create(
+        [Assignment(patient_id=p, clinician_id=c) for p, c in new], batch_size=BATCH_SIZE
+    )
+    links_added(new)
+    # bulk_create skips m2m_changed; the change feed reports links through the patient.
+    Patient.objects.filter(pk__in={p for p, _ in new}).update(updated_at=now)
+    return len(new)
+
+
+def _import_chunk(chunk, validator, report, use_copy):
+    patients, procedures = {}, []
+    # The memo of validated patients only spans a chunk, keeping memory bounded.
+    validator.patients.clear()
+    for line, record in chunk:
+        report.rows += 1
+        try:
+            patient, rows = validator.validate(record)
+        except ValidationError as exc:
+            report.add_error(line, exc.detail)
+            continue
+        # A later row for the same email wins.
+        patients[patient["email"]] = patient
+        procedures.extend((patient["email"], *row) for row in rows)
+    if not patients:
+        return
+
+    now = timezone.now()
+    if use_copy:
+        patient_ids = _copy_upsert_patients(patients, report, now)
+    else:
+        patient_ids = _bulk_upsert_patients(patients, report)
+    if procedures:
+        rows = {
+            (name, date, patient_ids[email], clinician_id)
+            for email, name, date, clinician_id in procedures
+        }
+        if use_copy:
+            created = _copy_insert_procedures(rows, now)
+        else:
+            created = _bulk_insert_procedures(rows)
+        report.procedures_created += len(created)
+        procedures_changed(Counter(created))
+        report.assignments_created += _link({(row[2], row[3]) for row in rows}, now)
+    # Bulk writes bypass the model signals behind invalidation.
+    invalidate()
+
+
+def _until_read_error(records, report):
+    try:
+        yield from records
+    except ReadError as exc:
+        report.fatal_error = {"line": exc.line, "error": str(exc)}
+
+
+# Streams records into the database a chunk at a time: each chunk is one
+# transaction, and memory is bounded by the chunk size rather than the file.
+# Invalid records are reported and skipped; everything else is upserted on
+# email, with procedures attached to clinicians resolved by name. A file that
+# cannot be read further stops the import at that line, keeping the rows
+# before it; a chunk the database rejects stops it at the chunk's first line,
+# keeping the chunks already committed.
+def import_records(
+    records,
+    create_missing=False,
+    chunk_size=IMPORT_CHUNK_SIZE,
+    use_copy=None,
+    progress=lambda report: None,
+):
+    if use_copy is None:
+        use_copy = connection.vendor == "postgresql"
+    report = ImportReport()
+    lookup = ClinicianLookup(report, create_missing)
+    validator = RecordValidator(lookup)
+    records = _until_read_error(records, report)
+    while chunk := list(itertools.islice(records, chunk_size)):
+        # Counted apart so that a chunk which rolls back adds nothing.
+        counts = lookup.report = ImportReport()
+        try:
+            with transaction.atomic():
+                _import_chunk(chunk, validator, counts, use_copy)
+        except DatabaseError as exc:
+            report.fatal_error = {"line": chunk[0][0], "error": str(exc)}
+            break
+        report.merge(counts)
+        progress(report)
+    return report
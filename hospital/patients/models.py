@@ -13,6 +13,12 @@ class Patient(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="patient_created_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="patient_updated_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.email})"
 
@@ -25,5 +31,12 @@ class Procedure(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"], name="procedure_date_idx"),
+            models.Index(fields=["clinician", "date"], name="procedure_clinician_date_idx"),
+            models.Index(fields=["updated_at", "id"], name="procedure_updated_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} for {self.patient.name}"
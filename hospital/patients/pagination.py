@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PatientCursorPagination(CursorPagination):
+    ordering = ("created_at", "id")
+
+
+def wants_cursor_pagination(request):
+    params = request.query_params
+    return (
+        params.get("pagination") == "cursor" or PatientCursorPagination.cursor_query_param in params
+    )
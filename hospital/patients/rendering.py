@@ -0,0 +1,152 @@
+import json
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from ..instrumentation import timed_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_encoder = JSONEncoder()
+# DRF formats datetimes itself (millisecond precision, "Z" for UTC); orjson
+# hands them back to DRF's encoder instead of using its own format.
+_ORJSON_OPTIONS = orjson and orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+_AS_IS = (
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.BooleanField,
+    drf_fields.ReadOnlyField,
+)
+
+
+def dumps(data, escape_line_separators=True):
+    if orjson is not None:
+        output = orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+    else:
+        output = json.dumps(
+            data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode()
+    if escape_line_separators:
+        # Same as JSONRenderer: U+2028/U+2029 are valid JSON but not valid JavaScript.
+        output = output.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return output
+
+
+class FastJSONRenderer(JSONRenderer):
+    # Byte-identical to JSONRenderer for the compact, unicode output the API
+    # uses; anything else (indent requests, other settings) goes through DRF.
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            data is None
+            or orjson is None
+            or not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON)
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+def _datetime_converter(field):
+    if (
+        getattr(field, "format", api_settings.DATETIME_FORMAT) or ""
+    ).lower() != drf_fields.ISO_8601:
+        return None
+    has_timezone = hasattr(field, "timezone")
+
+    # DateTimeField.enforce_timezone + to_representation for aware values;
+    # returns None for anything else so the caller can defer to the field.
+    def convert(value, current_timezone):
+        target = field.timezone if has_timezone else current_timezone
+        if target is None or isinstance(value, str) or timezone.is_naive(value):
+            return None
+        value = value.astimezone(target).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+# Serializes rows fetched with .values(sources) the way serializer_class would
+# serialize the corresponding instances. Field types with a known output are
+# converted inline; anything else falls back to the DRF field itself.
+class FieldPlan:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._compiled = None
+
+    def _compile(self):
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if "." in field.source or field.source == "*":
+                raise ImproperlyConfigured(f"{name}: only plain model fields can be planned")
+            if isinstance(field, drf_fields.DateTimeField):
+                kind, converter = "datetime", _datetime_converter(field)
+            elif (
+                isinstance(field, drf_fields.DateField)
+                and (getattr(field, "format", api_settings.DATE_FORMAT) or "").lower()
+                == drf_fields.ISO_8601
+            ):
+                kind, converter = "date", None
+            elif isinstance(field, _AS_IS) or (
+                # .values() already returns the related primary key.
+                isinstance(field, PrimaryKeyRelatedField)
+                and field.pk_field is None
+            ):
+                kind, converter = "as_is", None
+            else:
+                kind, converter = "field", None
+            plan.append((name, field.source, kind, converter, field))
+        return plan
+
+    @property
+    def plan(self):
+        # Compiled lazily: building serializer fields needs the app registry.
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    # A plan for some of the fields, in serializer order.
+    def subset(self, names):
+        plan = FieldPlan(self.serializer_class)
+        plan._compiled = [entry for entry in self.plan if entry[0] in names]
+        return plan
+
+    @property
+    def sources(self):
+        return [source for _, source, _, _, _ in self.plan]
+
+    def serialize(self, rows):
+        with timed_serialization():
+            return self._serialize(rows)
+
+    def _serialize(self, rows):
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = self.plan
+        result = []
+        for row in rows:
+            record = {}
+            for name, source, kind, converter, field in plan:
+                value = row[source]
+                if value is None or kind == "as_is":
+                    record[name] = value
+                elif kind == "date" and not isinstance(value, str):
+                    record[name] = value.isoformat()
+                elif kind == "datetime" and converter is not None:
+                    converted = converter(value, current_timezone)
+                    record[name] = (
+                        converted if converted is not None else field.to_representation(value)
+                    )
+                else:
+                    record[name] = field.to_representation(value)
+            result.append(record)
+        return result
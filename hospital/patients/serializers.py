@@ -0,0 +1,74 @@
+from rest_framework import serializers
+from .models import Patient, Procedure
+from .rendering import FieldPlan
+from ..clinicians.models import Clinician
+from ..departments.models import Department
+from ..instrumentation import TimedSerializerMixin
+
+
+class PatientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Patient
+        fields = ["id", "name", "gender", "email", "date_of_birth", "created_at", "updated_at"]
+
+
+# PatientSerializer's output for rows fetched with .values(*PATIENT_PLAN.sources).
+PATIENT_PLAN = FieldPlan(PatientSerializer)
+
+
+# Embedded in patient responses by ?expand=.
+class DepartmentSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Department
+        fields = ["id", "name"]
+
+
+class ClinicianSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Clinician
+        fields = ["id", "name", "department"]
+
+
+class ClinicianWithDepartmentSerializer(ClinicianSummarySerializer):
+    department = DepartmentSummarySerializer()
+
+
+class PatientProcedureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Procedure
+        fields = ["id", "name", "date", "clinician"]
+
+
+PATIENT_PROCEDURE_PLAN = FieldPlan(PatientProcedureSerializer)
+
+
+class BulkPatientSerializer(PatientSerializer):
+    id = serializers.IntegerField(required=False)
+
+    class Meta(PatientSerializer.Meta):
+        # Email uniqueness is checked for the whole batch in one query.
+        extra_kwargs = {"email": {"validators": []}}
+
+
+class BulkProcedureSerializer(serializers.Serializer):
+    patient = serializers.IntegerField()
+    clinician = serializers.IntegerField()
+    name = serializers.CharField(max_length=255)
+    date = serializers.DateTimeField()
+
+
+# Rows in the export format. Source ids and timestamps are not imported, and
+# plain serializers skip ModelSerializer's per-instance field building. Values
+# are kept untrimmed so an export imports back unchanged.
+class ImportPatientSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255, trim_whitespace=False)
+    gender = serializers.ChoiceField(choices=Patient._meta.get_field("gender").choices)
+    email = serializers.EmailField(max_length=254)
+    date_of_birth = serializers.DateField()
+
+
+class ImportProcedureSerializer(serializers.Serializer):
+    procedure_name = serializers.CharField(max_length=255, trim_whitespace=False)
+    procedure_date = serializers.DateTimeField()
+    clinician_name = serializers.CharField(max_length=255, trim_whitespace=False)
+    department_name = serializers.CharField(max_length=255, trim_whitespace=False)
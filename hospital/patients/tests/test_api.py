@@ -106,7 +106,7 @@ class TestPatientAPI:
         results = response.json()
 
         test_patient_result = None
-        for patient_result in results:
+        for patient_result in results["results"]:
             if patient_result["patient_id"] == patient.id:
                 test_patient_result = patient_result
                 break
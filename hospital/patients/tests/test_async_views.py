@@ -0,0 +1,132 @@
+import json
+import threading
+import pytest
+from unittest import mock
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..async_views import _on_own_connection
+from ..models import Patient, Procedure
+
+
+def _bodies(api_client, sync_url, async_url, params=None):
+    sync_response = api_client.get(sync_url, params)
+    async_response = api_client.get(async_url, params)
+    assert async_response.status_code == sync_response.status_code
+    async_body = async_response.content.decode().replace("/api/async/", "/api/")
+    return json.loads(sync_response.content), json.loads(async_body), async_response
+
+
+@pytest.fixture
+def patients(clinician):
+    created = [
+        Patient.objects.create(
+            name=f"Async Patient {i}",
+            email=f"async.{i}@example.com",
+            gender="MFO"[i % 3],
+            date_of_birth="1980-01-01",
+        )
+        for i in range(25)
+    ]
+    for patient in created[::4]:
+        Procedure.objects.create(
+            name="Heart Surgery", date=timezone.now(), patient=patient, clinician=clinician
+        )
+        patient.clinicians.add(clinician)
+    return created
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    @pytest.mark.parametrize(
+        "params", [{}, {"page": 2}, {"page": 9}, {"page": "x"}, {"search": "Patient 1"}]
+    )
+    def test_list_matches_sync(self, api_client, patients, params):
+        expected, actual, _ = _bodies(
+            api_client, reverse("patient-list"), reverse("async-patient-list"), params
+        )
+        assert actual == expected
+
+    def test_detail_matches_sync(self, api_client, patients):
+        pk = patients[3].pk
+        expected, actual, _ = _bodies(
+            api_client,
+            reverse("patient-detail", kwargs={"pk": pk}),
+            reverse("async-patient-detail", kwargs={"pk": pk}),
+        )
+        assert actual == expected
+
+        response = api_client.get(reverse("async-patient-detail", kwargs={"pk": 0}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.parametrize("params", [{"procedure_name": "surgery"}, {}])
+    def test_by_procedure_matches_sync(self, api_client, patients, params):
+        expected, actual, response = _bodies(
+            api_client,
+            reverse("patient-by-procedure"),
+            reverse("async-patient-by-procedure"),
+            params,
+        )
+        assert actual == expected
+        if params:
+            assert len(actual["results"]) == 7
+            assert response["X-Cache"] == "MISS"
+            again = api_client.get(reverse("async-patient-by-procedure"), params)
+            assert again["X-Cache"] == "HIT"
+
+    @pytest.mark.parametrize(
+        "department_id", [None, "current", "999999", "abc"], ids=["all", "one", "missing", "bad"]
+    )
+    def test_by_department_matches_sync(self, api_client, patients, department, department_id):
+        if department_id == "current":
+            department_id = department["id"]
+        params = {"department_id": department_id} if department_id else {}
+        expected, actual, _ = _bodies(
+            api_client,
+            reverse("clinician-patient-count-by-department"),
+            reverse("async-clinician-patient-count-by-department"),
+            params,
+        )
+        assert actual == expected
+
+    def test_only_get_is_allowed(self, api_client):
+        response = api_client.post(reverse("async-patient-list"), {})
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_own_connection_is_wrapped_and_kept(patients):
+    queries, results = [], []
+
+    def wrapper(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    run = _on_own_connection(lambda: (Patient.objects.count(), connections["default"]), [wrapper])
+
+    def twice():
+        results.extend([run(), run()])
+
+    with mock.patch.dict(connections.settings["default"], CONN_MAX_AGE=60):
+        with mock.patch.object(type(connections["default"]), "close", autospec=True) as close:
+            thread = threading.Thread(target=twice)
+            thread.start()
+            thread.join()
+    (count, own_connection), (_, reused) = results
+    assert count == len(patients)
+    assert own_connection is reused and own_connection is not connections["default"]
+    assert len(queries) == 2 and own_connection.execute_wrappers == []
+    close.assert_not_called()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_own_connection_is_closed_once_obsolete(patients):
+    results = []
+    run = _on_own_connection(lambda: (Patient.objects.exists(), connections["default"]), [])
+    with mock.patch.dict(connections.settings["default"], CONN_MAX_AGE=0):
+        with mock.patch.object(type(connections["default"]), "close", autospec=True) as close:
+            thread = threading.Thread(target=lambda: results.append(run()))
+            thread.start()
+            thread.join()
+    close.assert_called_with(results[0][1])
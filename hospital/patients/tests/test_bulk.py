@@ -0,0 +1,100 @@
+import pytest
+import uuid
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Patient, Procedure
+
+
+def _patient_payload(name, **extra):
+    return {
+        "name": name,
+        "email": f"{name.lower().replace(' ', '.')}.{uuid.uuid4().hex[:8]}@example.com",
+        "gender": "F",
+        "date_of_birth": "1975-06-30",
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkEndpoints:
+    def test_bulk_create_and_update_patients(self, api_client, patient):
+        payload = [_patient_payload(f"Bulk Patient {i}") for i in range(50)]
+        payload.append({**_patient_payload("Renamed"), "id": patient.pk, "email": patient.email})
+
+        url = reverse("patient-bulk")
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, payload, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(context.captured_queries) < 10
+
+        assert [row["email"] for row in response.data] == [item["email"] for item in payload]
+        assert all(row["id"] for row in response.data)
+        assert Patient.objects.filter(name__startswith="Bulk Patient").count() == 50
+        patient.refresh_from_db()
+        assert patient.name == "Renamed"
+
+    def test_bulk_patients_reports_per_item_errors(self, api_client, patient):
+        duplicate = _patient_payload("Duplicate")
+        payload = [
+            _patient_payload("Valid"),
+            {**_patient_payload("Bad Gender"), "gender": "X"},
+            duplicate,
+            duplicate,
+            _patient_payload("Taken", email=patient.email),
+            {**_patient_payload("Ghost"), "id": 99999},
+        ]
+
+        response = api_client.post(reverse("patient-bulk"), payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        errors = {error["index"]: error["errors"] for error in response.data["errors"]}
+        assert sorted(errors) == [1, 3, 4, 5]
+        assert "gender" in errors[1]
+        assert "email" in errors[3] and "email" in errors[4]
+        assert "id" in errors[5]
+        assert not Patient.objects.filter(name="Valid").exists()
+
+    def test_bulk_assign_procedures(self, api_client, patient, clinician):
+        date = timezone.now().isoformat()
+        payload = [
+            {"patient": patient.pk, "clinician": clinician.pk, "name": f"Scan {i}", "date": date}
+            for i in range(30)
+        ]
+
+        url = reverse("patient-bulk-assign-procedures")
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(url, payload, format="json")
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(context.captured_queries) < 10
+        assert len(response.data) == 30
+        assert {row["patient"] for row in response.data} == {patient.pk}
+        assert Procedure.objects.filter(patient=patient).count() == 30
+
+    def test_bulk_assign_procedures_unknown_references(self, api_client, patient, clinician):
+        date = timezone.now().isoformat()
+        payload = [
+            {"patient": patient.pk, "clinician": clinician.pk, "name": "Scan", "date": date},
+            {"patient": 99999, "clinician": 99999, "name": "Scan", "date": date},
+            {"patient": patient.pk, "clinician": clinician.pk, "name": "Scan"},
+        ]
+
+        url = reverse("patient-bulk-assign-procedures")
+        response = api_client.post(url, payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"] == [
+            {
+                "index": 1,
+                "errors": {
+                    "patient": ["Patient not found."],
+                    "clinician": ["Clinician not found."],
+                },
+            },
+            {"index": 2, "errors": {"date": ["This field is required."]}},
+        ]
+        assert not Procedure.objects.filter(patient=patient).exists()
+
+    def test_bulk_requires_list(self, api_client):
+        response = api_client.post(reverse("patient-bulk"), {"name": "x"}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
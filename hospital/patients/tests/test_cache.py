@@ -0,0 +1,111 @@
+import runpy
+import pytest
+from types import SimpleNamespace
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Patient, Procedure
+
+
+def _get(api_client, url, params):
+    response = api_client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response
+
+
+@pytest.mark.django_db
+class TestAggregateCache:
+    def test_by_department_served_from_cache_until_assignment_changes(
+        self, api_client, department, clinician, patient, django_assert_num_queries
+    ):
+        url = reverse("clinician-patient-count-by-department")
+        params = {"department_id": department["id"]}
+        assert _get(api_client, url, params)["X-Cache"] == "MISS"
+        with django_assert_num_queries(0):
+            response = _get(api_client, url, params)
+        assert response["X-Cache"] == "HIT"
+        assert response.data[0]["patient_count"] == 0
+
+        patient.clinicians.add(clinician)
+        response = _get(api_client, url, params)
+        assert response["X-Cache"] == "MISS"
+        assert response.data[0]["patient_count"] == 1
+
+        patient.delete()
+        response = _get(api_client, url, params)
+        assert response["X-Cache"] == "MISS"
+        assert response.data[0]["patient_count"] == 0
+
+    def test_by_procedure_invalidated_by_writes(self, api_client, clinician, patient):
+        Procedure.objects.create(
+            name="Heart Surgery", date=timezone.now(), patient=patient, clinician=clinician
+        )
+        url = reverse("patient-by-procedure")
+        params = {"procedure_name": "Surgery"}
+        _get(api_client, url, params)
+        assert _get(api_client, url, params)["X-Cache"] == "HIT"
+
+        clinician.name = "Dr. Renamed"
+        clinician.save()
+        response = _get(api_client, url, params)
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"][0]["procedures"][0]["clinician_name"] == "Dr. Renamed"
+
+        api_client.post(
+            reverse("patient-bulk-assign-procedures"),
+            [
+                {
+                    "patient": patient.pk,
+                    "clinician": clinician.pk,
+                    "name": "Knee Surgery",
+                    "date": timezone.now().isoformat(),
+                }
+            ],
+            format="json",
+        )
+        response = _get(api_client, url, params)
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data["results"][0]["procedures"]) == 2
+
+        Patient.objects.filter(pk=patient.pk).get().save()
+        assert _get(api_client, url, params)["X-Cache"] == "MISS"
+
+    def test_errors_are_not_cached(self, api_client):
+        url = reverse("clinician-patient-count-by-department")
+        for _ in range(2):
+            response = api_client.get(url, {"department_id": 99999})
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            assert response["X-Cache"] == "MISS"
+
+    def test_cache_stats(self, api_client, department, clinician):
+        url = reverse("clinician-patient-count-by-department")
+        for _ in range(3):
+            _get(api_client, url, {"department_id": department["id"]})
+
+        response = _get(api_client, reverse("cache-stats-list"), {})
+        assert response.data["by_department"] == {"hits": 2, "misses": 1, "hit_ratio": 0.6667}
+
+
+def _server(workers):
+    return SimpleNamespace(cfg=SimpleNamespace(workers=workers), log=mock.Mock())
+
+
+def test_gunicorn_warns_about_several_workers_with_a_local_cache(settings, monkeypatch):
+    on_starting = runpy.run_path(str(settings.BASE_DIR / "gunicorn.conf.py"))["on_starting"]
+    local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    settings.CACHES = {**settings.CACHES, "aggregates": local}
+    server = _server(3)
+    on_starting(server)
+    assert "AGGREGATE_CACHE_BACKEND" in server.log.warning.call_args.args[0]
+    server = _server(1)
+    on_starting(server)
+    server.log.warning.assert_not_called()
+
+    monkeypatch.setenv("GUNICORN_REQUIRE_SHARED_CACHE", "1")
+    with pytest.raises(RuntimeError, match="AGGREGATE_CACHE_BACKEND"):
+        on_starting(_server(3))
+
+    shared = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://r"}
+    settings.CACHES = {**settings.CACHES, "aggregates": shared}
+    on_starting(_server(3))
@@ -0,0 +1,86 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from ..models import Patient
+
+
+def _make_patients(count):
+    return [
+        Patient.objects.create(
+            name=f"Patient {i}",
+            email=f"conditional.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_detail_not_modified_until_updated(
+        self, api_client, patient, django_assert_num_queries
+    ):
+        url = reverse("patient-detail", kwargs={"pk": patient.pk})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        assert etag.startswith('W/"')
+        assert "no-cache" in response["Cache-Control"]
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response["ETag"] == etag
+        assert not response.content
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        patient.name = "John Updated"
+        patient.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["name"] == "John Updated"
+        assert response["ETag"] != etag
+
+    def test_list_etag_tracks_page_contents(self, api_client, django_assert_num_queries):
+        first, second, third = _make_patients(3)
+        url = reverse("patient-list")
+        etag = api_client.get(url)["ETag"]
+        assert "Last-Modified" not in api_client.get(url)
+
+        with django_assert_num_queries(2):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        second.gender = "O"
+        second.save()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response["ETag"]
+
+        first.delete()
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 2
+
+    def test_list_etag_depends_on_query(self, api_client):
+        _make_patients(2)
+        url = reverse("patient-list")
+        etag = api_client.get(url)["ETag"]
+
+        response = api_client.get(url, {"search": "Patient 1"}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+
+        cursor_etag = api_client.get(url, {"pagination": "cursor"})["ETag"]
+        with_cursor = {"pagination": "cursor"}
+        response = api_client.get(url, with_cursor, HTTP_IF_NONE_MATCH=cursor_etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        Patient.objects.create(
+            name="Late Patient",
+            email="late@example.com",
+            gender="M",
+            date_of_birth="1990-01-01",
+        )
+        response = api_client.get(url, with_cursor, HTTP_IF_NONE_MATCH=cursor_etag)
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,106 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Patient, Procedure
+from ..serializers import PatientSerializer
+from ...clinicians.models import Clinician
+
+
+@pytest.fixture
+def patients(clinician):
+    other = Clinician.objects.create(name="Dr. Jones", department=clinician.department)
+    patients = []
+    for i in range(3):
+        patient = Patient.objects.create(
+            name=f"Expand {i}",
+            email=f"expand.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        patient.clinicians.add(clinician, other)
+        Procedure.objects.create(
+            name="Checkup", date=timezone.now(), patient=patient, clinician=clinician
+        )
+        patients.append(patient)
+    return patients
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    def test_list_trims_output_and_select(self, api_client, patients):
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(reverse("patient-list"), {"fields": "name,id"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0] == {"id": patients[0].pk, "name": "Expand 0"}
+        page_query = context.captured_queries[-1]["sql"]
+        assert '"name"' in page_query and '"email"' not in page_query
+
+    def test_cursor_list_with_fields(self, api_client, patients):
+        response = api_client.get(
+            reverse("patient-list"), {"pagination": "cursor", "fields": "name"}
+        )
+        assert response.data["results"] == [
+            {"name": p.name} for p in sorted(patients, key=lambda p: (p.created_at, p.id))
+        ]
+
+    def test_detail_fields(self, api_client, patient):
+        url = reverse("patient-detail", kwargs={"pk": patient.pk})
+        response = api_client.get(url, {"fields": "email"})
+        assert response.data == {"email": patient.email}
+        assert response["ETag"] != api_client.get(url)["ETag"]
+        assert api_client.get(url).data == PatientSerializer(patient).data
+
+    @pytest.mark.parametrize("params", [{"fields": "name,ssn"}, {"fields": ""}, {"expand": "x"}])
+    def test_unknown_names_rejected(self, api_client, patient, params):
+        for url in (
+            reverse("patient-list"),
+            reverse("patient-detail", kwargs={"pk": patient.pk}),
+        ):
+            response = api_client.get(url, params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert "error" in response.data
+
+
+@pytest.mark.django_db
+class TestExpand:
+    def test_list_expansions_use_one_query_each(
+        self, api_client, patients, clinician, django_assert_num_queries
+    ):
+        # count, page, clinicians with departments, procedures
+        with django_assert_num_queries(4):
+            response = api_client.get(
+                reverse("patient-list"),
+                {"expand": "clinicians.department,procedures", "fields": "id"},
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert "ETag" not in response
+        record = response.data["results"][0]
+        assert record["clinicians"][0] == {
+            "id": clinician.pk,
+            "name": "Dr. Smith",
+            "department": {"id": clinician.department_id, "name": "Test Cardiology"},
+        }
+        assert len(record["clinicians"]) == 2
+        procedure = patients[0].procedures.get()
+        assert record["procedures"] == [
+            {
+                "id": procedure.pk,
+                "name": "Checkup",
+                "date": procedure.date.isoformat().replace("+00:00", "Z"),
+                "clinician": clinician.pk,
+            }
+        ]
+
+    def test_detail_expand_clinicians(self, api_client, patients, clinician):
+        url = reverse("patient-detail", kwargs={"pk": patients[0].pk})
+        response = api_client.get(url, {"expand": "clinicians"})
+        assert response.data["name"] == "Expand 0"
+        assert response.data["clinicians"][0] == {
+            "id": clinician.pk,
+            "name": "Dr. Smith",
+            "department": clinician.department_id,
+        }
+        assert "procedures" not in response.data
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Patient, Procedure
+from ...clinicians.models import Clinician
+from ...departments.models import Department
+
+
+def _lines(response):
+    assert response.status_code == status.HTTP_200_OK
+    return b"".join(response.streaming_content).decode().splitlines()
+
+
+@pytest.mark.django_db
+class TestPatientExport:
+    def test_export_ndjson_with_procedures(self, api_client, patient, clinician):
+        Procedure.objects.create(
+            name="Heart Surgery", date=timezone.now(), patient=patient, clinician=clinician
+        )
+
+        response = api_client.get(reverse("patient-export"), {"include": "procedures"})
+        assert response["Content-Type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in _lines(response)]
+        record = next(r for r in records if r["id"] == patient.pk)
+        assert record["email"] == patient.email
+        assert record["date_of_birth"] == "1990-01-01"
+        assert record["procedures"][0]["procedure_name"] == "Heart Surgery"
+        assert record["procedures"][0]["clinician_name"] == "Dr. Smith"
+        assert record["procedures"][0]["department_name"] == "Test Cardiology"
+
+    def test_export_csv(self, api_client, patient, clinician):
+        for name in ["X-Ray", "Checkup"]:
+            Procedure.objects.create(
+                name=name, date=timezone.now(), patient=patient, clinician=clinician
+            )
+
+        response = api_client.get(
+            reverse("patient-export"), {"output": "csv", "include": "procedures"}
+        )
+        assert response["Content-Type"] == "text/csv"
+        rows = list(csv.DictReader(io.StringIO("\n".join(_lines(response)))))
+        patient_rows = [row for row in rows if row["id"] == str(patient.pk)]
+        assert [row["procedure_name"] for row in patient_rows] == ["X-Ray", "Checkup"]
+
+        rows = list(
+            csv.reader(_lines(api_client.get(reverse("patient-export"), {"output": "csv"})))
+        )
+        assert rows[0] == [
+            "id",
+            "name",
+            "gender",
+            "email",
+            "date_of_birth",
+            "created_at",
+            "updated_at",
+        ]
+
+    def test_export_filters(self, api_client, patient, clinician):
+        other = Patient.objects.create(
+            name="Other Person", email="other@example.com", gender="O", date_of_birth="1960-01-01"
+        )
+        other.clinicians.add(
+            Clinician.objects.create(
+                name="Dr. Elsewhere", department=Department.objects.create(name="Elsewhere")
+            )
+        )
+        patient.clinicians.add(clinician)
+
+        url = reverse("patient-export")
+        response = api_client.get(url, {"department_id": clinician.department_id})
+        assert [json.loads(line)["id"] for line in _lines(response)] == [patient.pk]
+
+        Patient.objects.filter(pk=patient.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = api_client.get(url, {"updated_after": since})
+        ids = [json.loads(line)["id"] for line in _lines(response)]
+        assert other.pk in ids and patient.pk not in ids
+
+    def test_export_rejects_bad_parameters(self, api_client):
+        url = reverse("patient-export")
+        assert api_client.get(url, {"output": "xml"}).status_code == status.HTTP_400_BAD_REQUEST
+        response = api_client.get(url, {"updated_after": "yesterday"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = api_client.get(url, {"department_id": "cardio"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,288 @@
+import io
+import json
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.urls import reverse
+from rest_framework import status
+from .. import importing
+from ..importing import csv_records, import_records, ndjson_records
+from ..models import Patient, Procedure
+from ...clinicians.models import Clinician
+from ...counters import find_drift
+from ...departments.models import Department
+
+CSV_HEADER = (
+    "id,name,gender,email,date_of_birth,created_at,updated_at,procedure_id,procedure_name,"
+    "procedure_date,clinician_id,clinician_name,department_name\n"
+)
+
+
+def _csv(*rows):
+    return io.StringIO(CSV_HEADER + "".join(row + "\n" for row in rows))
+
+
+def _ndjson(*records):
+    return io.StringIO("".join(json.dumps(record) + "\n" for record in records))
+
+
+def _export(api_client, output):
+    response = api_client.get(
+        reverse("patient-export"), {"output": output, "include": "procedures"}
+    )
+    return b"".join(response.streaming_content)
+
+
+def _state():
+    return sorted(
+        (
+            p.email,
+            p.name,
+            p.gender,
+            p.date_of_birth,
+            sorted((pr.name, pr.date, pr.clinician_id) for pr in p.procedures.all()),
+        )
+        for p in Patient.objects.all()
+    )
+
+
+def _upload(api_client, content, name="patients.csv", **params):
+    url = reverse("patient-import")
+    if params:
+        url += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+    return api_client.post(url, {"file": SimpleUploadedFile(name, content)}, format="multipart")
+
+
+@pytest.mark.django_db
+class TestImportRecords:
+    def test_csv_rows_group_procedures_and_link_clinicians(self, clinician):
+        report = import_records(
+            csv_records(
+                _csv(
+                    ",Ann,F,ann@example.com,1980-02-29,,,,Checkup,2024-01-01T09:00:00Z,,"
+                    "Dr. Smith,Test Cardiology",
+                    ",Ann,F,ann@example.com,1980-02-29,,,,ECG,2024-01-02T09:00:00Z,,"
+                    "Dr. Smith,Test Cardiology",
+                    ",Bob,M,bob@example.com,1970-01-01,,,,,,,,",
+                )
+            ),
+            chunk_size=2,
+        )
+        assert report.error_count == 0
+        assert (report.rows, report.patients_created, report.procedures_created) == (3, 2, 2)
+        ann = Patient.objects.get(email="ann@example.com")
+        assert sorted(ann.procedures.values_list("name", flat=True)) == ["Checkup", "ECG"]
+        assert list(ann.clinicians.all()) == [clinician]
+        assert not Patient.objects.get(email="bob@example.com").procedures.exists()
+        assert find_drift() == []
+
+    def test_upserts_on_email_and_reimport_is_a_no_op(self, patient, clinician):
+        record = {
+            "name": "Renamed",
+            "gender": "M",
+            "email": patient.email,
+            "date_of_birth": "1990-01-01",
+            "procedures": [
+                {
+                    "procedure_name": "MRI Scan",
+                    "procedure_date": "2024-03-01T00:00:00Z",
+                    "clinician_name": "Dr. Smith",
+                    "department_name": "Test Cardiology",
+                }
+            ],
+        }
+        report = import_records(ndjson_records(_ndjson(record)))
+        assert (report.patients_created, report.patients_updated) == (0, 1)
+        patient.refresh_from_db()
+        assert (patient.name, patient.gender) == ("Renamed", "M")
+        updated_at = patient.updated_at
+
+        report = import_records(ndjson_records(_ndjson(record)))
+        assert (report.patients_updated, report.procedures_created) == (0, 0)
+        assert report.assignments_created == 0
+        patient.refresh_from_db()
+        assert patient.updated_at == updated_at
+        assert Procedure.objects.get().date == datetime(2024, 3, 1, tzinfo=dt_timezone.utc)
+        assert Patient.objects.count() == 1
+
+    def test_invalid_records_are_reported_and_skipped(self, clinician):
+        lines = io.StringIO(
+            '{"name": "Ok", "gender": "F", "email": "ok@example.com", '
+            '"date_of_birth": "1990-01-01"}\n'
+            "\n"
+            "not json\n"
+            '{"name": "Bad", "gender": "X", "email": "bad@example.com", '
+            '"date_of_birth": "1990-01-01"}\n'
+            '{"name": "Lost", "gender": "F", "email": "lost@example.com", '
+            '"date_of_birth": "1990-01-01", "procedures": [{"procedure_name": "ECG", '
+            '"procedure_date": "2024-01-01T00:00:00Z", "clinician_name": "Dr. Nobody", '
+            '"department_name": "Test Cardiology"}]}\n'
+        )
+        report = import_records(ndjson_records(lines))
+        assert report.rows == 4
+        assert report.patients_created == 1
+        errors = {error["line"]: error["errors"] for error in report.errors}
+        assert sorted(errors) == [3, 4, 5]
+        assert "gender" in errors[4]
+        assert "clinician_name" in errors[5]["procedures"][0]
+        assert list(Patient.objects.values_list("email", flat=True)) == ["ok@example.com"]
+
+    def test_create_missing_departments_and_clinicians(self, db):
+        row = ",Ann,F,ann@example.com,1980-01-01,,,,ECG,2024-01-01T00:00:00Z,,Dr. New,Genetics"
+        report = import_records(csv_records(_csv(row, row)), create_missing=True)
+        assert (report.departments_created, report.clinicians_created) == (1, 1)
+        clinician = Clinician.objects.get(name="Dr. New", department__name="Genetics")
+        assert clinician.procedure_count == 1 and clinician.patient_count == 1
+        assert Department.objects.get(name="Genetics").patient_count == 1
+
+    def test_csv_requires_patient_columns(self, db):
+        with pytest.raises(ValueError, match="email"):
+            import_records(csv_records(io.StringIO("name,gender\nAnn,F\n")))
+
+    def test_unreadable_csv_stops_at_the_line_and_keeps_earlier_rows(self, db):
+        row = ",{},F,{}@example.com,1980-01-01,,,,,,,,"
+        lines = _csv(
+            row.format("Ann", "ann"),
+            row.format("Bob", "bob"),
+            row.format("Cat", "cat"),
+            row.format("x" * 200_000, "big"),
+            row.format("Dan", "dan"),
+        )
+        report = import_records(csv_records(lines), chunk_size=2)
+        assert report.fatal_error["line"] == 5
+        assert "field limit" in report.fatal_error["error"]
+        assert (report.rows, report.patients_created) == (3, 3)
+        assert Patient.objects.count() == 3
+
+    def test_database_error_stops_at_the_chunk_and_keeps_committed_chunks(self, db, monkeypatch):
+        bulk_insert = importing._bulk_insert_procedures
+        calls = []
+
+        def failing_insert(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise IntegrityError("duplicate key value violates unique constraint")
+            return bulk_insert(rows)
+
+        monkeypatch.setattr(importing, "_bulk_insert_procedures", failing_insert)
+        row = ",{0},F,{0}@example.com,1980-01-01,,,,ECG,2024-01-01T00:00:00Z,,Dr. {0},{1}"
+        lines = _csv(
+            row.format("ann", "Genetics"),
+            row.format("bob", "Genetics"),
+            row.format("cat", "Oncology"),
+            row.format("dan", "Oncology"),
+        )
+        report = import_records(
+            csv_records(lines), create_missing=True, chunk_size=2, use_copy=False
+        )
+        assert report.fatal_error == {
+            "line": 4,
+            "error": "duplicate key value violates unique constraint",
+        }
+        assert (report.rows, report.patients_created, report.procedures_created) == (2, 2, 2)
+        assert (report.departments_created, report.clinicians_created) == (1, 2)
+        assert list(Department.objects.values_list("name", flat=True)) == ["Genetics"]
+        assert Patient.objects.count() == 2
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="COPY is PostgreSQL-only")
+    def test_copy_path_matches_bulk_create(self, patient, clinician):
+        row = ",{},F,{},1990-01-01,,,,ECG,2024-01-01T00:00:00Z,,Dr. Smith,Test Cardiology"
+        rows = [row.format("Renamed", patient.email), row.format("Ann", "ann@example.com")]
+        report = import_records(csv_records(_csv(*rows)), use_copy=True)
+        assert (report.patients_created, report.patients_updated) == (1, 1)
+        assert report.procedures_created == 2
+        report = import_records(csv_records(_csv(*rows)), use_copy=True)
+        assert (report.patients_updated, report.procedures_created) == (0, 0)
+        assert find_drift() == []
+
+
+@pytest.mark.django_db
+class TestImportEndpointAndCommand:
+    @pytest.mark.parametrize("output", ["csv", "ndjson"])
+    def test_export_round_trips(self, api_client, patient, clinician, output):
+        Patient.objects.create(
+            name="Zoë  ", gender="O", email="zoe@example.com", date_of_birth="2000-12-31"
+        )
+        for name, day in [("Checkup", 1), ("ECG", 2)]:
+            Procedure.objects.create(
+                name=name,
+                date=datetime(2024, 1, day, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+                patient=patient,
+                clinician=clinician,
+            )
+        exported, before = _export(api_client, output), _state()
+        Patient.objects.all().delete()
+
+        response = _upload(api_client, exported, name=f"patients.{output}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["patients_created"] == 2
+        assert response.data["errors"] == []
+        assert _state() == before
+
+    def test_upload_errors(self, api_client, db):
+        response = api_client.post(reverse("patient-import"), {}, format="multipart")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert _upload(api_client, b"", name="patients.xlsx").status_code == 400
+        response = _upload(api_client, b"name\nAnn\n", input="csv")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Missing columns" in response.json()["error"]
+
+    def test_large_uploads_are_refused(self, api_client, settings, db):
+        settings.IMPORT_UPLOAD_MAX_BYTES = len(CSV_HEADER)
+        response = _upload(api_client, (CSV_HEADER + ",Ann,F,a@example.com,1980-01-01\n").encode())
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert "import_patients" in response.json()["error"]
+        assert not Patient.objects.exists()
+
+    def test_upload_reports_row_errors(self, api_client, clinician):
+        content = (CSV_HEADER + ",Ann,F,not-an-email,1980-01-01,,,,,,,,\n").encode()
+        response = _upload(api_client, b"\xef\xbb\xbf" + content)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["error_count"] == 1
+        assert response.data["errors"][0]["line"] == 2
+        assert "email" in response.data["errors"][0]["errors"]
+
+    def test_upload_reports_undecodable_line_with_committed_counts(self, api_client, db):
+        rows = "".join(f",P{i},F,p{i}@example.com,1980-01-01,,,,,,,,\n" for i in range(3))
+        content = (CSV_HEADER + rows).encode() + b",Bad\xff,F,bad@example.com,1980-01-01\n"
+        response = _upload(api_client, content)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["error"].startswith("line 5: Not valid UTF-8")
+        assert response.data["fatal_error"]["line"] == 5
+        assert response.data["patients_created"] == 3
+        assert Patient.objects.count() == 3
+
+    def test_command(self, tmp_path, clinician):
+        path = tmp_path / "patients.ndjson"
+        path.write_text(
+            json.dumps(
+                {
+                    "name": "Ann",
+                    "gender": "F",
+                    "email": "ann@example.com",
+                    "date_of_birth": "1980-01-01",
+                }
+            )
+            + "\n"
+        )
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_patients", str(path), chunk_size=1, stdout=out, stderr=err)
+        assert "1 patients created" in out.getvalue()
+        assert "1 rows" in err.getvalue()
+        assert Patient.objects.filter(email="ann@example.com").exists()
+
+        with pytest.raises(CommandError, match="format"):
+            call_command("import_patients", str(tmp_path / "patients.txt"))
+
+        with pytest.raises(CommandError, match="Cannot open"):
+            call_command("import_patients", str(tmp_path / "missing.ndjson"))
+        with pytest.raises(CommandError, match="Cannot open"):
+            call_command("import_patients", str(tmp_path), input="ndjson")
+
+        path.write_bytes(path.read_bytes() + b"\xff\n")
+        out = io.StringIO()
+        with pytest.raises(CommandError, match="Stopped at line 2"):
+            call_command("import_patients", str(path), stdout=out, stderr=io.StringIO())
+        assert "Imported 1 rows" in out.getvalue()
@@ -1,10 +1,13 @@
 import pytest
 import uuid
+from django.db import connection
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework import status
 from ..models import Patient, Procedure
+from ...clinicians.models import Clinician
+from ...departments.models import Department
 
 
 @pytest.mark.django_db
@@ -122,8 +125,46 @@ class TestPatientIntegration:
         url = "/api/patients/by_procedure/"
         response = api_client.get(url, {"procedure_name": "Heart Surgery"})
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
-        assert response.data[0]["patient_name"] == "John Doe"
+        assert len(response.data["results"]) >= 1
+        assert response.data["results"][0]["patient_name"] == "John Doe"
+
+    def test_patients_by_procedure_query_budget(
+        self, api_client, clinician, django_assert_num_queries
+    ):
+        other_clinician = Clinician.objects.create(
+            name="Dr. Jones", department=clinician.department
+        )
+        for i in range(5):
+            patient = Patient.objects.create(
+                name=f"Patient {i}",
+                email=f"patient.{i}.{uuid.uuid4().hex[:8]}@example.com",
+                gender="F",
+                date_of_birth="1980-01-01",
+            )
+            for doctor in (clinician, other_clinician):
+                Procedure.objects.create(
+                    name="Knee Surgery",
+                    date=timezone.now() + timedelta(days=i),
+                    patient=patient,
+                    clinician=doctor,
+                )
+            Procedure.objects.create(
+                name="Blood Test", date=timezone.now(), patient=patient, clinician=clinician
+            )
+
+        url = reverse("patient-by-procedure")
+        with django_assert_num_queries(3):
+            response = api_client.get(url, {"procedure_name": "surgery"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        assert len(response.data["results"]) == 5
+        for row in response.data["results"]:
+            assert [p["procedure_name"] for p in row["procedures"]] == ["Knee Surgery"] * 2
+            assert {p["clinician_name"] for p in row["procedures"]} == {"Dr. Smith", "Dr. Jones"}
+
+    def test_patients_by_procedure_requires_name(self, api_client):
+        response = api_client.get(reverse("patient-by-procedure"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
 
     def patient_count_by_department(self, api_client, department, clinician, patient):
         patient.clinicians.add(clinician)
@@ -132,6 +173,84 @@ class TestPatientIntegration:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data) >= 1
 
+    def test_patient_count_by_departments_single_query(
+        self, api_client, department, clinician, patient, django_assert_num_queries
+    ):
+        other_department = Department.objects.create(name="Test Neurology")
+        neurologist = Clinician.objects.create(name="Dr. Brain", department=other_department)
+        patient.clinicians.add(clinician, neurologist)
+        second = Patient.objects.create(
+            name="Mary Major",
+            email=f"mary.major.{uuid.uuid4().hex[:8]}@example.com",
+            gender="F",
+            date_of_birth="1970-02-02",
+        )
+        second.clinicians.add(clinician)
+
+        url = reverse("clinician-patient-count-by-department")
+        with django_assert_num_queries(1):
+            response = api_client.get(
+                url, {"department_id": f"{department['id']},{other_department.id}"}
+            )
+        assert response.status_code == status.HTTP_200_OK
+        counts = {row["clinician_name"]: row for row in response.data}
+        assert counts["Dr. Smith"]["patient_count"] == 2
+        assert counts["Dr. Smith"]["department_name"] == "Test Cardiology"
+        assert counts["Dr. Brain"]["patient_count"] == 1
+
+        response = api_client.get(url, {"department_id": other_department.id})
+        assert [row["clinician_id"] for row in response.data] == [neurologist.id]
+
+        response = api_client.get(url)
+        assert {clinician.id, neurologist.id} <= {row["clinician_id"] for row in response.data}
+
+    def test_patient_count_by_department_errors(self, api_client):
+        url = reverse("clinician-patient-count-by-department")
+        response = api_client.get(url, {"department_id": "abc"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.get(url, {"department_id": 99999})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_list_patients_cursor_pagination(self, api_client, django_assert_num_queries):
+        created = [
+            Patient.objects.create(
+                name=f"Cursor Patient {i}",
+                email=f"cursor.{i}.{uuid.uuid4().hex[:8]}@example.com",
+                gender="O",
+                date_of_birth="2000-01-01",
+            )
+            for i in range(25)
+        ]
+
+        url = reverse("patient-list")
+        with django_assert_num_queries(1):
+            response = api_client.get(url, {"pagination": "cursor", "search": "Cursor Patient"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "count" not in response.data
+        assert response.data["previous"] is None
+        first_page = [p["id"] for p in response.data["results"]]
+        assert first_page == [p.id for p in created[:20]]
+
+        response = api_client.get(response.data["next"])
+        assert response.status_code == status.HTTP_200_OK
+        assert [p["id"] for p in response.data["results"]] == [p.id for p in created[20:]]
+        assert response.data["next"] is None
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="trigram ranking needs pg_trgm")
+    def test_search_patients_ranked_by_similarity(self, api_client):
+        for name in ["Johnathan Smithers", "John Smith", "Jon Smythe"]:
+            Patient.objects.create(
+                name=name,
+                email=f"{uuid.uuid4().hex[:8]}@example.com",
+                gender="M",
+                date_of_birth="1990-01-01",
+            )
+
+        response = api_client.get(reverse("patient-list"), {"search": "John Smith"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["name"] == "John Smith"
+
     def test_error_handling(self, api_client):
         url = reverse("patient-detail", kwargs={"pk": 99999})
         response = api_client.get(url)
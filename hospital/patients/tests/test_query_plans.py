@@ -0,0 +1,145 @@
+import pytest
+from datetime import timedelta
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ..models import Patient, Procedure
+from ...clinicians.models import Clinician
+from ...datagen import generate
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="query plans are only checked against PostgreSQL",
+    ),
+]
+
+LARGE_TABLES = {"hospital_patient", "hospital_procedure", "hospital_patient_clinicians"}
+
+
+# Plans depend on table sizes and statistics, so the module builds a dataset
+# large enough for indexes to pay off, analyzes it and leaves the planner's
+# settings alone. Like seeded_dataset, it is rolled back afterwards.
+PLAN_DATASET = dict(departments=15, clinicians=300, patients=20_000, procedures=80_000, seed=3)
+RARE_PROCEDURE = "Lobotomy"
+
+
+@pytest.fixture(scope="module")
+def dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        outer = transaction.atomic()
+        outer.__enter__()
+        try:
+            generate(**PLAN_DATASET)
+            patients = list(Patient.objects.order_by("id")[:5])
+            clinician = Clinician.objects.order_by("id").first()
+            Procedure.objects.bulk_create(
+                Procedure(
+                    name=RARE_PROCEDURE, date=timezone.now(), patient=patient, clinician=clinician
+                )
+                for patient in patients
+            )
+            with connection.cursor() as cursor:
+                # Autovacuum would merge the rows from GIN pending lists into
+                # the trigram indexes; until then the planner prices them high.
+                cursor.execute(
+                    "SELECT gin_clean_pending_list(index.indexrelid) FROM pg_index index "
+                    "JOIN pg_class class ON class.oid = index.indexrelid "
+                    "JOIN pg_am am ON am.oid = class.relam "
+                    "WHERE am.amname = 'gin' AND index.indrelid::regclass::text = ANY(%s)",
+                    [sorted(LARGE_TABLES)],
+                )
+                cursor.execute(f"ANALYZE {', '.join(sorted(LARGE_TABLES))}")
+            # Its email is unique, as a search for one patient would be.
+            patient = Patient.objects.order_by("id")[PLAN_DATASET["patients"] // 2]
+            yield {"department": clinician.department, "patient": patient}
+        finally:
+            transaction.set_rollback(True)
+            outer.__exit__(None, None, None)
+
+
+def _seq_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def _index_names(plan):
+    found = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= _index_names(child)
+    return found
+
+
+def _plans(captured_queries):
+    plans = {}
+    with connection.cursor() as cursor:
+        for query in captured_queries:
+            sql = query["sql"]
+            if sql.lstrip().upper().startswith("SELECT"):
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plans[sql] = cursor.fetchone()[0][0]["Plan"]
+    assert plans
+    return plans
+
+
+def assert_no_seq_scans(captured_queries):
+    for sql, plan in _plans(captured_queries).items():
+        # Counting a whole table has to read all of it.
+        if sql.startswith("SELECT COUNT(*)") and " WHERE " not in sql:
+            continue
+        assert not _seq_scans(plan), f"sequential scan in plan for: {sql}"
+
+
+def assert_uses_index(captured_queries, index_name):
+    used = set().union(*map(_index_names, _plans(captured_queries).values()))
+    assert index_name in used
+
+
+def _get(api_client, url, params):
+    with CaptureQueriesContext(connection) as context:
+        response = api_client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return context.captured_queries
+
+
+class TestQueryPlans:
+    def test_patient_list(self, api_client, dataset):
+        assert_no_seq_scans(_get(api_client, reverse("patient-list"), {"page": 3}))
+
+    def test_patient_list_cursor(self, api_client, dataset):
+        assert_no_seq_scans(_get(api_client, reverse("patient-list"), {"pagination": "cursor"}))
+
+    def test_patient_search(self, api_client, dataset):
+        term = dataset["patient"].email.split("@")[0]
+        queries = _get(api_client, reverse("patient-list"), {"search": term})
+        assert_no_seq_scans(queries)
+        assert_uses_index(queries, "patient_email_trgm_idx")
+
+    def test_patient_detail(self, api_client, dataset):
+        url = reverse("patient-detail", kwargs={"pk": dataset["patient"].pk})
+        assert_no_seq_scans(_get(api_client, url, {}))
+
+    def test_patients_by_procedure(self, api_client, dataset):
+        params = {"procedure_name": RARE_PROCEDURE.lower()}
+        queries = _get(api_client, reverse("patient-by-procedure"), params)
+        assert_no_seq_scans(queries)
+        assert_uses_index(queries, "procedure_name_trgm_idx")
+
+    def test_patient_count_by_department(self, api_client, dataset):
+        url = reverse("clinician-patient-count-by-department")
+        assert_no_seq_scans(_get(api_client, url, {"department_id": dataset["department"].pk}))
+
+    def test_patient_change_feed(self, api_client, dataset):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        assert_no_seq_scans(_get(api_client, reverse("changes-patients"), {"since": since}))
+
+    def test_procedure_change_feed(self, api_client, dataset):
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        assert_no_seq_scans(_get(api_client, reverse("changes-procedures"), {"since": since}))
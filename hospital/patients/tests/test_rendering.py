@@ -0,0 +1,96 @@
+import json
+import uuid
+import pytest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from .. import rendering
+from ..models import Patient
+from ..rendering import FastJSONRenderer, dumps
+from ..serializers import PATIENT_PLAN, PatientSerializer
+
+TRICKY = {
+    "text": 'quote " backslash \\ tab \t nul \x00 line para  é 漢字 🙂',
+    "when": datetime(2024, 3, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+    "naive": datetime(2024, 3, 1, 12, 30, 5),
+    "offset": datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=-5))),
+    "day": date(2024, 2, 29),
+    "amount": Decimal("12.50"),
+    "uuid": uuid.UUID(int=1),
+    "nested": [{"pair": (1, 2)}, None, True, 0, -7, ""],
+}
+
+
+@pytest.fixture
+def tricky_patients(db):
+    Patient.objects.create(
+        name='Zoë O\'Brien "Q"',
+        email="zoe@example.org",
+        gender="F",
+        date_of_birth=date(1990, 1, 1),
+    )
+    Patient.objects.create(
+        name="Leap Day", email="leap@example.org", gender="O", date_of_birth=date(2000, 2, 29)
+    )
+    # Whole-second timestamps serialize without a fractional part.
+    Patient.objects.filter(email="leap@example.org").update(
+        created_at=datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    )
+    return list(Patient.objects.order_by("id"))
+
+
+class TestDumps:
+    def test_matches_json_renderer(self):
+        assert FastJSONRenderer().render(TRICKY) == JSONRenderer().render(TRICKY)
+
+    def test_line_separators_unescaped_on_request(self):
+        expected = json.dumps(TRICKY, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+        assert dumps(TRICKY, escape_line_separators=False) == expected.encode()
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(rendering, "orjson", None)
+        assert FastJSONRenderer().render(TRICKY) == JSONRenderer().render(TRICKY)
+        assert dumps(TRICKY) == JSONRenderer().render(TRICKY)
+
+    def test_indent_uses_json_renderer(self):
+        context = {"indent": 2}
+        assert FastJSONRenderer().render(TRICKY, renderer_context=context) == (
+            JSONRenderer().render(TRICKY, renderer_context=context)
+        )
+
+
+@pytest.mark.django_db
+class TestFieldPlan:
+    @pytest.mark.parametrize("zone", ["UTC", "America/New_York"])
+    def test_matches_serializer(self, tricky_patients, zone):
+        with timezone.override(zone):
+            rows = Patient.objects.order_by("id").values(*PATIENT_PLAN.sources)
+            assert PATIENT_PLAN.serialize(rows) == (
+                PatientSerializer(tricky_patients, many=True).data
+            )
+
+    def test_list_bytes_match_serializer(self, api_client, tricky_patients):
+        response = api_client.get(reverse("patient-list"))
+        expected = {
+            "count": len(tricky_patients),
+            "next": None,
+            "previous": None,
+            "results": PatientSerializer(tricky_patients, many=True).data,
+        }
+        assert response.content == JSONRenderer().render(expected)
+
+    def test_cursor_list_uses_rows(self, api_client, tricky_patients):
+        response = api_client.get(reverse("patient-list"), {"pagination": "cursor"})
+        ordered = sorted(tricky_patients, key=lambda patient: (patient.created_at, patient.id))
+        assert response.json()["results"] == PatientSerializer(ordered, many=True).data
+
+    def test_export_bytes_match_serializer(self, api_client, tricky_patients):
+        response = api_client.get(reverse("patient-export"))
+        expected = "".join(
+            json.dumps(record, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in PatientSerializer(tricky_patients, many=True).data
+        )
+        assert b"".join(response.streaming_content) == expected.encode()
@@ -0,0 +1,121 @@
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from django.urls import reverse
+from rest_framework import status
+from ..models import Procedure
+from ...clinicians.models import Clinician
+from ...departments.models import Department
+
+
+def _at(day, hour=12):
+    return datetime(2024, 1, day, hour, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def procedures(patient, clinician):
+    neurology = Department.objects.create(name="Neurology")
+    brain = Clinician.objects.create(name="Dr. Brain", department=neurology)
+    for when, who in [
+        (_at(1), clinician),
+        (_at(1, 23), clinician),
+        (_at(2), clinician),
+        (_at(2), brain),
+        (_at(9), brain),
+        (datetime(2024, 2, 1, tzinfo=dt_timezone.utc), clinician),
+    ]:
+        Procedure.objects.create(name="Checkup", date=when, patient=patient, clinician=who)
+    return clinician, brain
+
+
+def _timeline(api_client, **params):
+    params.setdefault("start", "2024-01-01")
+    params.setdefault("end", "2024-02-01")
+    return api_client.get(reverse("procedure-timeline"), params)
+
+
+@pytest.mark.django_db
+class TestProcedureTimeline:
+    def test_daily_counts_by_department(self, api_client, procedures, django_assert_num_queries):
+        cardiology, neurology = (c.department for c in procedures)
+        with django_assert_num_queries(1):
+            response = _timeline(api_client)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"] == [
+            {
+                "department_id": cardiology.pk,
+                "department_name": "Test Cardiology",
+                "counts": [
+                    {"start": "2024-01-01", "count": 2},
+                    {"start": "2024-01-02", "count": 1},
+                ],
+            },
+            {
+                "department_id": neurology.pk,
+                "department_name": "Neurology",
+                "counts": [
+                    {"start": "2024-01-02", "count": 1},
+                    {"start": "2024-01-09", "count": 1},
+                ],
+            },
+        ]
+
+    def test_weekly_and_monthly_buckets_by_clinician(self, api_client, procedures):
+        clinician, brain = procedures
+        data = _timeline(api_client, bucket="week", group_by="clinician").json()
+        assert data["bucket"] == "week"
+        # 2024-01-01 is a Monday, so weeks start there and on 2024-01-08.
+        assert [(s["clinician_name"], s["counts"]) for s in data["results"]] == [
+            ("Dr. Smith", [{"start": "2024-01-01", "count": 3}]),
+            (
+                "Dr. Brain",
+                [{"start": "2024-01-01", "count": 1}, {"start": "2024-01-08", "count": 1}],
+            ),
+        ]
+
+        data = _timeline(
+            api_client, bucket="month", end="2024-03-01", clinician_id=str(clinician.pk)
+        ).json()
+        assert data["results"][0]["counts"] == [
+            {"start": "2024-01-01", "count": 3},
+            {"start": "2024-02-01", "count": 1},
+        ]
+
+    def test_cached_until_procedures_change(self, api_client, procedures, patient):
+        clinician, _ = procedures
+        assert _timeline(api_client)["X-Cache"] == "MISS"
+        assert _timeline(api_client)["X-Cache"] == "HIT"
+        Procedure.objects.create(name="X-Ray", date=_at(3), patient=patient, clinician=clinician)
+        response = _timeline(api_client)
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["results"][0]["counts"][-1] == {"start": "2024-01-03", "count": 1}
+
+    def test_cached_until_procedures_are_bulk_assigned(self, api_client, procedures, patient):
+        clinician, _ = procedures
+        assert _timeline(api_client)["X-Cache"] == "MISS"
+        assert _timeline(api_client)["X-Cache"] == "HIT"
+        payload = [
+            {"patient": patient.pk, "clinician": clinician.pk, "name": "X-Ray", "date": _at(3)}
+        ]
+        response = api_client.post(
+            reverse("patient-bulk-assign-procedures"), payload, format="json"
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        response = _timeline(api_client)
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["results"][0]["counts"][-1] == {"start": "2024-01-03", "count": 1}
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"bucket": "hour"},
+            {"group_by": "patient"},
+            {"start": "yesterday"},
+            {"start": "2024-02-01", "end": "2024-01-01"},
+            {"start": "2020-01-01", "end": "2024-01-01", "bucket": "day"},
+            {"department_id": "x"},
+        ],
+    )
+    def test_invalid_parameters(self, api_client, params):
+        response = _timeline(api_client, **params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "error" in response.json()
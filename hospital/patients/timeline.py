@@ -0,0 +1,89 @@
+from datetime import datetime, time, timedelta
+from django.db.models import Count, DateTimeField
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Procedure
+
+BUCKETS = {"day": 1, "week": 7, "month": 31}
+GROUPS = {
+    "clinician": ("clinician_id", "clinician__name"),
+    "department": ("clinician__department_id", "clinician__department__name"),
+}
+DEFAULT_DAYS = 90
+# Caps the response at roughly this many buckets per group.
+MAX_BUCKETS = 400
+
+
+def _parse_bound(value, name):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None and (day := parse_date(value)) is not None:
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"Invalid {name}")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _parse_ids(params, name):
+    try:
+        return [int(value) for item in params.getlist(name) for value in item.split(",") if value]
+    except ValueError:
+        raise ValueError(f"Invalid {name}")
+
+
+def parse_timeline_params(params):
+    bucket = params.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    group_by = params.get("group_by", "department")
+    if group_by not in GROUPS:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUPS)}")
+
+    end = _parse_bound(params["end"], "end") if params.get("end") else timezone.now()
+    if params.get("start"):
+        start = _parse_bound(params["start"], "start")
+    else:
+        start = end - timedelta(days=DEFAULT_DAYS)
+    if start >= end:
+        raise ValueError("start must be before end")
+    if (end - start).days / BUCKETS[bucket] > MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets")
+
+    return {
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "group_by": group_by,
+        "clinician_ids": _parse_ids(params, "clinician_id"),
+        "department_ids": _parse_ids(params, "department_id"),
+    }
+
+
+# Procedure counts per group and bucket over [start, end), aggregated in the
+# database. The date range is an index range scan and, when the table is
+# partitioned by month, touches only the partitions it overlaps. Buckets
+# start at midnight in the current time zone; empty buckets are omitted.
+def procedure_timeline(start, end, bucket, group_by, clinician_ids=(), department_ids=()):
+    procedures = Procedure.objects.filter(date__gte=start, date__lt=end)
+    if clinician_ids:
+        procedures = procedures.filter(clinician_id__in=clinician_ids)
+    if department_ids:
+        procedures = procedures.filter(clinician__department_id__in=department_ids)
+
+    key, name = GROUPS[group_by]
+    rows = (
+        procedures.annotate(bucket=Trunc("date", bucket, output_field=DateTimeField()))
+        .values(key, name, "bucket")
+        .annotate(count=Count("id"))
+        .order_by(key, "bucket")
+    )
+    series = []
+    for row in rows:
+        if not series or series[-1][f"{group_by}_id"] != row[key]:
+            series.append({f"{group_by}_id": row[key], f"{group_by}_name": row[name], "counts": []})
+        start_date = timezone.localtime(row["bucket"]).date()
+        series[-1]["counts"].append({"start": start_date, "count": row["count"]})
+    return series
@@ -1,22 +1,139 @@
-from rest_framework import viewsets, status, serializers
+from django.conf import settings
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.filters import SearchFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from .bulk import create_procedures, upsert_patients
+from .conditional import conditional_response, detail_etag, list_etag
+from .expansion import expand_records, parse_expand, parse_fields
+from .export import EXPORT_FORMATS, export_queryset, iter_csv, iter_ndjson
+from .importing import decode_lines, import_records, input_format, read_records
 from .models import Patient, Procedure
+from .pagination import PatientCursorPagination, wants_cursor_pagination
+from .rendering import FastJSONRenderer
+from .search import TrigramSearchFilter
+from .serializers import PATIENT_PLAN, PatientSerializer
+from .timeline import parse_timeline_params, procedure_timeline
+from ..cache import BY_DEPARTMENT, BY_PROCEDURE, TIMELINE, cached_response
 from ..clinicians.models import Clinician
 
 
-class PatientSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Patient
-        fields = ["id", "name", "gender", "email", "date_of_birth", "created_at", "updated_at"]
+def _procedure_row(procedure):
+    return {
+        "id": procedure.id,
+        "name": procedure.name,
+        "date": procedure.date,
+        "patient": procedure.patient_id,
+        "clinician": procedure.clinician_id,
+    }
+
+
+def _by_procedure_row(patient):
+    return {
+        "patient_id": patient.id,
+        "patient_name": patient.name,
+        "gender": patient.gender,
+        "email": patient.email,
+        "date_of_birth": patient.date_of_birth,
+        "procedures": [
+            {
+                "procedure_id": proc.id,
+                "procedure_name": proc.name,
+                "procedure_date": proc.date,
+                "clinician_name": proc.clinician.name,
+            }
+            for proc in patient.matching_procedures
+        ],
+    }
 
 
 class PatientViewSet(viewsets.ModelViewSet):
-    queryset = Patient.objects.all()
+    queryset = Patient.objects.order_by("id")
     serializer_class = PatientSerializer
-    filter_backends = [SearchFilter]
+    filter_backends = [TrigramSearchFilter]
     search_fields = ["name", "email"]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.request is not None and wants_cursor_pagination(self.request):
+                self._paginator = PatientCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+    def _page_state(self):
+        if isinstance(self.paginator, PatientCursorPagination):
+            return self.paginator.has_next, self.paginator.has_previous
+        return self.paginator.page.paginator.count
+
+    # ?fields= trims the output (and the columns read); ?expand= embeds related
+    # rows. Raises ValueError for unknown names.
+    def _representation(self, request):
+        fields = parse_fields(request.query_params, PatientSerializer.Meta.fields)
+        plan = PATIENT_PLAN if fields is None else PATIENT_PLAN.subset(fields)
+        return plan, parse_expand(request.query_params)
+
+    def _records(self, plan, expand, rows):
+        records = plan.serialize(rows)
+        if expand:
+            expand_records(records, [row["id"] for row in rows], expand)
+        return records
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = getattr(self, "_plan", None)
+        if self.action == "retrieve" and plan is not None:
+            queryset = queryset.only(*plan.sources, "updated_at")
+        return queryset
+
+    # Pages are read as plain rows and serialized through PATIENT_PLAN, which
+    # gives the same output as PatientSerializer without building instances.
+    # Expanded responses carry no ETag: edits to the embedded rows do not move
+    # the patient's updated_at.
+    def list(self, request, *args, **kwargs):
+        try:
+            plan, expand = self._representation(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = [*plan.sources, "id", "updated_at"]
+        if isinstance(self.paginator, PatientCursorPagination):
+            columns += self.paginator.ordering
+        page = self.paginate_queryset(queryset.values(*dict.fromkeys(columns)))
+        if page is None:
+            return super().list(request, *args, **kwargs)
+
+        def respond():
+            return self.get_paginated_response(self._records(plan, expand, page))
+
+        if expand:
+            return respond()
+        return conditional_response(
+            request, list_etag(request, page, self._page_state()), None, respond
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            self._plan, expand = self._representation(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        instance = self.get_object()
+
+        def respond():
+            return Response(self._records(self._plan, expand, [vars(instance)])[0])
+
+        if expand:
+            return respond()
+        return conditional_response(
+            request, detail_etag(request, instance), instance.updated_at, respond
+        )
 
     @action(detail=True, methods=["post"])
     def assign_procedure(self, request, pk=None):
@@ -39,17 +156,98 @@ class PatientViewSet(viewsets.ModelViewSet):
         procedure = Procedure.objects.create(
             name=name, date=date, patient=patient, clinician=clinician
         )
+        return Response(_procedure_row(procedure), status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Expected a list of patients"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        patients, errors = upsert_patients(request.data)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PatientSerializer(patients, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"])
+    def bulk_assign_procedures(self, request):
+        if not isinstance(request.data, list):
+            return Response(
+                {"error": "Expected a list of procedures"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        procedures, errors = create_procedures(request.data)
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
         return Response(
-            {
-                "id": procedure.id,
-                "name": procedure.name,
-                "date": procedure.date,
-                "patient": procedure.patient.id,
-                "clinician": procedure.clinician.id,
-            },
+            [_procedure_row(procedure) for procedure in procedures],
             status=status.HTTP_201_CREATED,
         )
 
+    # Loads a file in the export layout; see import_records. The import runs
+    # inside the request, so files over IMPORT_UPLOAD_MAX_BYTES are refused in
+    # favour of the import_patients command.
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_file(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"error": "Upload the file in the 'file' field"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if upload.size > settings.IMPORT_UPLOAD_MAX_BYTES:
+            return Response(
+                {
+                    "error": f"Files over {settings.IMPORT_UPLOAD_MAX_BYTES} bytes must be loaded "
+                    "with the import_patients management command"
+                },
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        try:
+            fmt = request.query_params.get("input") or input_format(upload.name)
+            report = import_records(
+                read_records(decode_lines(upload), fmt),
+                create_missing=request.query_params.get("create_missing") == "true",
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if report.fatal_error:
+            error = f"line {report.fatal_error['line']}: {report.fatal_error['error']}"
+            return Response(
+                {"error": error, **report.as_dict()}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(report.as_dict())
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        include_procedures = request.query_params.get("include") == "procedures"
+        try:
+            patients = export_queryset(request.query_params, include_procedures)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The body is streamed after the view returns, outside the request's
+        # database routing, so fix the alias now.
+        patients = patients.using(patients.db)
+        rows = iter_csv if output == "csv" else iter_ndjson
+        response = StreamingHttpResponse(
+            rows(patients, include_procedures), content_type=EXPORT_FORMATS[output]
+        )
+        response["Content-Disposition"] = f'attachment; filename="patients.{output}"'
+        return response
+
     @action(detail=False, methods=["get"])
     def by_procedure(self, request):
         procedure_name = request.query_params.get("procedure_name")
@@ -58,57 +256,89 @@ class PatientViewSet(viewsets.ModelViewSet):
                 {"error": "procedure_name parameter required"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        patients = Patient.objects.filter(procedures__name__icontains=procedure_name).distinct()
-        result = []
-        for patient in patients:
-            patient_procedures = []
-            for proc in patient.procedures.filter(name__icontains=procedure_name):
-                patient_procedures.append(
-                    {
-                        "procedure_id": proc.id,
-                        "procedure_name": proc.name,
-                        "procedure_date": proc.date,
-                        "clinician_name": proc.clinician.name,
-                    }
-                )
-            result.append(
-                {
-                    "patient_id": patient.id,
-                    "patient_name": patient.name,
-                    "gender": patient.gender,
-                    "email": patient.email,
-                    "date_of_birth": patient.date_of_birth,
-                    "procedures": patient_procedures,
-                }
+        return cached_response(
+            BY_PROCEDURE, request, lambda: self._patients_by_procedure(procedure_name)
+        )
+
+    def _patients_by_procedure(self, procedure_name):
+        matching_procedures = (
+            Procedure.objects.filter(name__icontains=procedure_name)
+            .select_related("clinician")
+            .order_by("id")
+        )
+        patients = (
+            Patient.objects.filter(
+                id__in=Procedure.objects.filter(name__icontains=procedure_name).values("patient_id")
             )
-        return Response(result)
+            .order_by("id")
+            .prefetch_related(
+                Prefetch("procedures", queryset=matching_procedures, to_attr="matching_procedures")
+            )
+        )
+
+        page = self.paginate_queryset(patients)
+        if page is not None:
+            return self.get_paginated_response([_by_procedure_row(p) for p in page])
+        return Response([_by_procedure_row(p) for p in patients])
+
+
+def _clinician_count_rows(department_ids):
+    clinicians = Clinician.objects.all()
+    if department_ids:
+        clinicians = clinicians.filter(department_id__in=department_ids)
+    rows = clinicians.values("id", "name", "department__name", "patient_count").order_by(
+        "department_id", "id"
+    )
+    return [
+        {
+            "clinician_id": row["id"],
+            "clinician_name": row["name"],
+            "department_name": row["department__name"],
+            "patient_count": row["patient_count"],
+        }
+        for row in rows
+    ]
+
+
+def _parse_department_ids(request):
+    raw = request.query_params.getlist("department_id")
+    return [int(value) for item in raw for value in item.split(",") if value.strip()]
 
 
 class ClinicianPatientCountViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"])
     def by_department(self, request):
-        department_id = request.query_params.get("department_id")
-        if not department_id:
-            return Response(
-                {"error": "department_id parameter required"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
         try:
-            clinicians = Clinician.objects.filter(department_id=department_id)
-            if not clinicians.exists():
-                return Response({"error": "Department not found"}, status=status.HTTP_404_NOT_FOUND)
+            department_ids = _parse_department_ids(request)
         except ValueError:
             return Response({"error": "Invalid department_id"}, status=status.HTTP_400_BAD_REQUEST)
 
-        result = []
-        for clinician in clinicians:
-            patient_count = clinician.patients.count()
-            result.append(
-                {
-                    "clinician_id": clinician.id,
-                    "clinician_name": clinician.name,
-                    "department_name": clinician.department.name,
-                    "patient_count": patient_count,
-                }
-            )
+        return cached_response(BY_DEPARTMENT, request, lambda: self._patient_counts(department_ids))
+
+    def _patient_counts(self, department_ids):
+        result = _clinician_count_rows(department_ids)
+        if department_ids and not result:
+            return Response({"error": "Department not found"}, status=status.HTTP_404_NOT_FOUND)
         return Response(result)
+
+
+class ProcedureViewSet(viewsets.ViewSet):
+    @action(detail=False, methods=["get"])
+    def timeline(self, request):
+        try:
+            params = parse_timeline_params(request.query_params)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return cached_response(TIMELINE, request, lambda: self._timeline(params))
+
+    def _timeline(self, params):
+        return Response(
+            {
+                "bucket": params["bucket"],
+                "group_by": params["group_by"],
+                "start": params["start"],
+                "end": params["end"],
+                "results": procedure_timeline(**params),
+            }
+        )
@@ -0,0 +1,25 @@
+from django.db import models
+from ..departments.models import Department
+
+
+class DepartmentRollup(models.Model):
+    department = models.OneToOneField(
+        Department, on_delete=models.CASCADE, primary_key=True, related_name="rollup"
+    )
+    patient_count = models.PositiveIntegerField(default=0)
+    procedure_count = models.PositiveIntegerField(default=0)
+    procedure_name_count = models.PositiveIntegerField(default=0)
+    last_procedure_date = models.DateTimeField(null=True)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Rollup for department {self.department_id}"
+
+
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=64, primary_key=True)
+    # Rows whose updated_at is after this are picked up by the next refresh.
+    through = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} through {self.through}"
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+from .models import DepartmentRollup, RollupWatermark
+from ..clinicians.models import Clinician
+from ..departments.models import Department
+from ..patients.models import Patient, Procedure
+
+WATERMARK = "department_rollups"
+Assignment = Patient.clinicians.through
+
+
+def _changed_department_ids(since):
+    # Inserts and updates: each query is a range scan on an updated_at index.
+    querysets = [
+        Procedure.objects.filter(updated_at__gt=since).values_list("clinician__department_id"),
+        Assignment.objects.filter(patient__updated_at__gt=since).values_list(
+            "clinician__department_id"
+        ),
+        Clinician.objects.filter(updated_at__gt=since).values_list("department_id"),
+        Department.objects.filter(updated_at__gt=since).values_list("id"),
+    ]
+    return {pk for queryset in querysets for (pk,) in queryset.distinct()}
+
+
+def _stale_department_ids():
+    # Deletes and moves leave no updated_at behind, but they always change the
+    # department's transactionally maintained counters. Departments without a
+    # rollup row are new.
+    return set(
+        Department.objects.filter(
+            Q(rollup__isnull=True)
+            | ~Q(rollup__patient_count=F("patient_count"))
+            | ~Q(rollup__procedure_count=F("procedure_count"))
+        ).values_list("id", flat=True)
+    )
+
+
+def _recompute(department_ids, now):
+    procedures = {
+        row["clinician__department_id"]: row
+        for row in Procedure.objects.filter(clinician__department_id__in=department_ids)
+        .values("clinician__department_id")
+        .annotate(names=Count("name", distinct=True), last=Max("date"))
+        .order_by()
+    }
+    rollups = [
+        DepartmentRollup(
+            department_id=pk,
+            patient_count=patient_count,
+            procedure_count=procedure_count,
+            procedure_name_count=procedures.get(pk, {}).get("names", 0),
+            last_procedure_date=procedures.get(pk, {}).get("last"),
+            refreshed_at=now,
+        )
+        for pk, patient_count, procedure_count in Department.objects.filter(
+            id__in=department_ids
+        ).values_list("id", "patient_count", "procedure_count")
+    ]
+    DepartmentRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=["department"],
+        update_fields=[
+            "patient_count",
+            "procedure_count",
+            "procedure_name_count",
+            "last_procedure_date",
+            "refreshed_at",
+        ],
+    )
+    return len(rollups)
+
+
+# Recomputes the rollups of departments touched since the last run and moves
+# the watermark. The watermark trails the run by the settle window, so rows
+# from transactions that commit late are picked up again next time.
+def refresh_rollups(full=False):
+    now = timezone.now()
+    with transaction.atomic():
+        watermark = RollupWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        if full or watermark is None:
+            department_ids = set(Department.objects.values_list("id", flat=True))
+        else:
+            department_ids = _changed_department_ids(watermark.through) | _stale_department_ids()
+        refreshed = _recompute(department_ids, now) if department_ids else 0
+        RollupWatermark.objects.update_or_create(
+            name=WATERMARK,
+            defaults={"through": now - timedelta(seconds=settings.ROLLUP_SETTLE_SECONDS)},
+        )
+    return refreshed
@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from .models import DepartmentRollup
+
+
+class DepartmentRollupSerializer(serializers.ModelSerializer):
+    department_name = serializers.CharField(source="department.name")
+
+    class Meta:
+        model = DepartmentRollup
+        fields = [
+            "department",
+            "department_name",
+            "patient_count",
+            "procedure_count",
+            "procedure_name_count",
+            "last_procedure_date",
+            "refreshed_at",
+        ]
@@ -0,0 +1,129 @@
+import pytest
+from datetime import datetime, timezone as dt_timezone
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from ..models import DepartmentRollup
+from ..refresh import refresh_rollups
+from ...clinicians.models import Clinician
+from ...departments.models import Department
+from ...patients.models import Patient, Procedure
+
+
+def _at(month, day=1):
+    return datetime(2024, month, day, tzinfo=dt_timezone.utc)
+
+
+def _rollup(department):
+    rollup = DepartmentRollup.objects.get(department=department)
+    return (
+        rollup.patient_count,
+        rollup.procedure_count,
+        rollup.procedure_name_count,
+        rollup.last_procedure_date,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(settings):
+    settings.ROLLUP_SETTLE_SECONDS = 0
+
+
+@pytest.fixture
+def hospital(db):
+    cardiology = Department.objects.create(name="Cardiology")
+    neurology = Department.objects.create(name="Neurology")
+    smith = Clinician.objects.create(name="Dr. Smith", department=cardiology)
+    jones = Clinician.objects.create(name="Dr. Jones", department=cardiology)
+    brain = Clinician.objects.create(name="Dr. Brain", department=neurology)
+    patients = [
+        Patient.objects.create(
+            name=f"Patient {i}",
+            email=f"rollup.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        for i in range(3)
+    ]
+    patients[0].clinicians.add(smith, jones)
+    patients[1].clinicians.add(smith, brain)
+    for name, when, patient, clinician in [
+        ("Checkup", _at(1), patients[0], smith),
+        ("Checkup", _at(2), patients[1], jones),
+        ("ECG", _at(3), patients[0], smith),
+        ("MRI Scan", _at(4), patients[1], brain),
+    ]:
+        Procedure.objects.create(name=name, date=when, patient=patient, clinician=clinician)
+    return cardiology, neurology, smith, brain, patients
+
+
+@pytest.mark.django_db
+class TestRefresh:
+    def test_full_refresh(self, hospital):
+        cardiology, neurology, *_ = hospital
+        empty = Department.objects.create(name="Empty")
+        assert refresh_rollups() == 3
+        assert _rollup(cardiology) == (2, 3, 2, _at(3))
+        assert _rollup(neurology) == (1, 1, 1, _at(4))
+        assert _rollup(empty) == (0, 0, 0, None)
+
+    def test_incremental_refresh_touches_only_changed_departments(self, hospital):
+        cardiology, neurology, smith, brain, patients = hospital
+        refresh_rollups()
+        assert refresh_rollups() == 0
+        neurology_refreshed = DepartmentRollup.objects.get(department=neurology).refreshed_at
+
+        Procedure.objects.create(name="Biopsy", date=_at(5), patient=patients[2], clinician=smith)
+        assert refresh_rollups() == 1
+        assert _rollup(cardiology) == (2, 4, 3, _at(5))
+        assert DepartmentRollup.objects.get(department=neurology).refreshed_at == (
+            neurology_refreshed
+        )
+
+    def test_deletes_and_moves_are_picked_up(self, hospital):
+        cardiology, neurology, smith, brain, patients = hospital
+        refresh_rollups()
+
+        Procedure.objects.filter(name="ECG").delete()
+        assert refresh_rollups() == 1
+        assert _rollup(cardiology) == (2, 2, 1, _at(2))
+
+        brain.department = cardiology
+        brain.save()
+        assert refresh_rollups() == 2
+        assert _rollup(cardiology) == (2, 3, 2, _at(4))
+        assert _rollup(neurology) == (0, 0, 0, None)
+
+        patients[2].clinicians.add(brain)
+        refresh_rollups()
+        assert _rollup(cardiology)[0] == 3
+
+    def test_command(self, hospital):
+        call_command("refresh_rollups", verbosity=0)
+        assert DepartmentRollup.objects.count() == 2
+        call_command("refresh_rollups", full=True, verbosity=0)
+
+
+@pytest.mark.django_db
+class TestRollupEndpoint:
+    def test_reads_precomputed_rows(self, api_client, hospital, django_assert_num_queries):
+        cardiology, neurology, *_ = hospital
+        refresh_rollups()
+        with django_assert_num_queries(2):
+            response = api_client.get(reverse("departmentrollup-list"))
+        assert response.status_code == status.HTTP_200_OK
+        assert [row["department_name"] for row in response.data["results"]] == [
+            "Cardiology",
+            "Neurology",
+        ]
+
+        url = reverse("departmentrollup-detail", kwargs={"pk": cardiology.pk})
+        with django_assert_num_queries(1):
+            response = api_client.get(url)
+        assert response.data["procedure_name_count"] == 2
+        assert response.data["last_procedure_date"] == "2024-03-01T00:00:00Z"
+
+    def test_read_only(self, api_client, hospital):
+        refresh_rollups()
+        response = api_client.post(reverse("departmentrollup-list"), {})
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
@@ -0,0 +1,9 @@
+from rest_framework import viewsets
+from .models import DepartmentRollup
+from .serializers import DepartmentRollupSerializer
+
+
+# Serves precomputed rows only; refresh_rollups keeps them current.
+class DepartmentRollupViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = DepartmentRollup.objects.select_related("department").order_by("department_id")
+    serializer_class = DepartmentRollupSerializer
@@ -0,0 +1,87 @@
+import random
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+PIN_COOKIE = "pin_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Reads only go to a replica inside a request that opted in below. Management
+# commands, signal handlers during writes and anything else outside a safe
+# request read from the primary, so they never see stale rows.
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def reading_from_replicas():
+    return bool(settings.DATABASE_REPLICAS) and _replica_reads.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading_from_replicas():
+            return random.choice(settings.DATABASE_REPLICAS)
+        # None keeps Django's default: the db of a hinted instance, else default.
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance that was read from a replica still
+        # writes to the primary.
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _use_replicas(self, request):
+        return request.method in SAFE_METHODS and PIN_COOKIE not in request.COOKIES
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _replica_reads.set(self._use_replicas(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        token = _replica_reads.set(self._use_replicas(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self._pin(request, response)
+
+    def _pin(self, request, response):
+        if request.method not in SAFE_METHODS:
+            # Read-your-writes: the client's next requests go to the primary
+            # until the replicas have had time to catch up.
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -4,8 +4,14 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = "django-insecure-your-secret-key-here"
-DEBUG = True
-ALLOWED_HOSTS = []
+DEBUG = os.environ.get("DJANGO_DEBUG", "1") == "1"
+# Set DJANGO_ALLOWED_HOSTS to every host name clients and load balancers use;
+# requests for any other Host header are answered with 400.
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1,[::1]").split(",")
+    if host.strip()
+]
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -19,6 +25,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "hospital.metrics.MetricsMiddleware",
+    "hospital.instrumentation.InstrumentationMiddleware",
+    "hospital.routers.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -29,6 +38,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = "hospital.urls"
+WSGI_APPLICATION = "hospital.wsgi.application"
+ASGI_APPLICATION = "hospital.asgi.application"
 
 TEMPLATES = [
     {
@@ -54,8 +65,74 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "hospital_pass"),
         "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        # Keep connections open between requests instead of reconnecting each time.
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
+if os.environ.get("DB_PGBOUNCER", "0") == "1":
+    # PgBouncer in transaction pooling mode cannot keep the named cursors that
+    # QuerySet.iterator() opens across transactions.
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+# Read replicas: safe requests read from one of these aliases, everything else
+# (and every request within REPLICA_PIN_SECONDS of a client's write) uses default.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["hospital.routers.ReplicaRouter"]
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", "5"))
+
+# Local memory is per process: invalidation does not reach other workers, so
+# gunicorn warns when several workers use it (see gunicorn.conf.py).
+AGGREGATE_CACHE_BACKEND = os.environ.get(
+    "AGGREGATE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "aggregates": {
+        "BACKEND": AGGREGATE_CACHE_BACKEND,
+        "LOCATION": os.environ.get("AGGREGATE_CACHE_LOCATION", "hospital-aggregates"),
+        "TIMEOUT": int(os.environ.get("AGGREGATE_CACHE_TTL", "300")),
+    },
+}
+if not AGGREGATE_CACHE_BACKEND.endswith("RedisCache"):
+    # Redis bounds memory through its own maxmemory eviction policy.
+    CACHES["aggregates"]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.environ.get("AGGREGATE_CACHE_MAX_ENTRIES", "10000")),
+        "CULL_FREQUENCY": 4,
+    }
+
+# In-process Prometheus metrics, scraped from /metrics.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+# Per-request query/timing instrumentation: Server-Timing headers plus a
+# structured warning on the hospital.instrumentation logger for slow requests.
+REQUEST_INSTRUMENTATION = os.environ.get("REQUEST_INSTRUMENTATION", "0") == "1"
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_QUERIES = int(os.environ.get("SLOW_REQUEST_QUERIES", "50"))
+SLOW_REQUEST_DUPLICATES = 5
+
+# Lets the async views run a request's independent queries concurrently on
+# PostgreSQL; off, they run one after another as in the sync views.
+ASYNC_CONCURRENT_QUERIES = os.environ.get("ASYNC_CONCURRENT_QUERIES", "1") == "1"
+
+# Change-feed rows newer than this are held back until concurrent write
+# transactions have had time to commit.
+CHANGE_FEED_SETTLE_SECONDS = int(os.environ.get("CHANGE_FEED_SETTLE_SECONDS", "5"))
+
+# Each rollup refresh re-reads rows this far behind its start, for the same reason.
+ROLLUP_SETTLE_SECONDS = int(os.environ.get("ROLLUP_SETTLE_SECONDS", "5"))
+
+# Unfiltered admin changelists over tables at least this large (by the
+# PostgreSQL planner's estimate) show the estimate instead of running COUNT(*).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get("ADMIN_ESTIMATED_COUNT_THRESHOLD", "100000"))
+
+# Uploads are imported inside the request, which gunicorn's timeout bounds;
+# larger files go through the import_patients command.
+IMPORT_UPLOAD_MAX_BYTES = int(os.environ.get("IMPORT_UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
@@ -63,6 +140,8 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+# Filled by collectstatic when the image is built and served by WhiteNoise (see wsgi.py).
+STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", BASE_DIR / "staticfiles")
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
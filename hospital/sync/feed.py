@@ -0,0 +1,129 @@
+import base64
+import json
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Tombstone
+from ..patients.models import Patient, Procedure
+from ..patients.serializers import PatientSerializer
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+PROCEDURE_FIELDS = ["id", "name", "date", "patient_id", "clinician_id", "created_at", "updated_at"]
+
+
+def _parse_timestamp(value, name):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValueError(f"Invalid {name}")
+    return parsed
+
+
+# A position holds one (timestamp, id) mark for changed rows and one for
+# tombstones. An id of None means "strictly after the timestamp" (from ?since=).
+def initial_position(since=None):
+    if not since:
+        return {"changed": None, "deleted": None}
+    mark = (_parse_timestamp(since, "since"), None)
+    return {"changed": mark, "deleted": mark}
+
+
+def encode_cursor(position):
+    payload = {key: mark and [mark[0].isoformat(), mark[1]] for key, mark in position.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return {
+            key: payload[key] and (_parse_timestamp(payload[key][0], "cursor"), payload[key][1])
+            for key in ("changed", "deleted")
+        }
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise ValueError("Invalid cursor")
+
+
+def _after(queryset, field, mark):
+    if mark is None:
+        return queryset
+    timestamp, pk = mark
+    if pk is None:
+        return queryset.filter(**{f"{field}__gt": timestamp})
+    # Same as (field, id) > (timestamp, pk), written so the range condition
+    # on the leading index column stays sargable.
+    return queryset.filter(**{f"{field}__gte": timestamp}).exclude(
+        **{field: timestamp, "id__lte": pk}
+    )
+
+
+def _patient_rows(queryset):
+    rows = list(queryset.values(*PatientSerializer.Meta.fields))
+    clinicians = defaultdict(list)
+    links = Patient.clinicians.through.objects.filter(patient_id__in=[row["id"] for row in rows])
+    for patient_id, clinician_id in links.order_by("clinician_id").values_list(
+        "patient_id", "clinician_id"
+    ):
+        clinicians[patient_id].append(clinician_id)
+    for row in rows:
+        row["clinicians"] = clinicians[row["id"]]
+    return rows
+
+
+def _procedure_rows(queryset):
+    rows = list(queryset.values(*PROCEDURE_FIELDS))
+    for row in rows:
+        row["patient"] = row.pop("patient_id")
+        row["clinician"] = row.pop("clinician_id")
+    return rows
+
+
+RESOURCES = {
+    "patients": (Patient, Tombstone.PATIENT, _patient_rows),
+    "procedures": (Procedure, Tombstone.PROCEDURE, _procedure_rows),
+}
+
+
+def _settled_before():
+    # updated_at is stamped when a row is saved, not when its transaction
+    # commits. Holding back the newest rows keeps a slow commit from landing
+    # behind a cursor that has already moved past its timestamp.
+    return timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+
+def changes(resource, position, limit=DEFAULT_LIMIT):
+    model, tombstone_resource, build_rows = RESOURCES[resource]
+    settled_before = _settled_before()
+
+    changed = _after(
+        model.objects.filter(updated_at__lte=settled_before), "updated_at", position["changed"]
+    ).order_by("updated_at", "id")[: limit + 1]
+    changed = build_rows(changed)
+    deleted = list(
+        _after(
+            Tombstone.objects.filter(resource=tombstone_resource, deleted_at__lte=settled_before),
+            "deleted_at",
+            position["deleted"],
+        )
+        .order_by("deleted_at", "id")
+        .values("id", "object_id", "deleted_at")[: limit + 1]
+    )
+
+    has_more = len(changed) > limit or len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+    next_position = {
+        "changed": (
+            (changed[-1]["updated_at"], changed[-1]["id"]) if changed else position["changed"]
+        ),
+        "deleted": (
+            (deleted[-1]["deleted_at"], deleted[-1]["id"]) if deleted else position["deleted"]
+        ),
+    }
+    return {
+        "changed": changed,
+        "deleted": [{"id": row["object_id"], "deleted_at": row["deleted_at"]} for row in deleted],
+        "next_cursor": encode_cursor(next_position),
+        "has_more": has_more,
+    }
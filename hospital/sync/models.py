@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    PATIENT = "patient"
+    PROCEDURE = "procedure"
+
+    resource = models.CharField(
+        max_length=16, choices=[(PATIENT, "Patient"), (PROCEDURE, "Procedure")]
+    )
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["resource", "deleted_at", "id"], name="tombstone_resource_deleted_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted at {self.deleted_at}"
@@ -0,0 +1,49 @@
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Tombstone
+from ..clinicians.models import Clinician
+from ..patients.models import Patient, Procedure
+
+Assignment = Patient.clinicians.through
+
+
+def _touch_patients(patient_ids):
+    # Assignments have no timestamp of their own; the change feed reports them
+    # through the patient's clinician list.
+    if patient_ids:
+        Patient.objects.filter(pk__in=patient_ids).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Assignment)
+def _assignments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_patient_ids = set(
+            Assignment.objects.filter(clinician_id=instance.pk).values_list("patient_id", flat=True)
+        )
+    elif action == "post_clear":
+        _touch_patients(
+            getattr(instance, "_cleared_patient_ids", set()) if reverse else {instance.pk}
+        )
+    elif action in ("post_add", "post_remove") and pk_set:
+        _touch_patients(pk_set if reverse else {instance.pk})
+
+
+@receiver(pre_delete, sender=Clinician)
+def _clinician_deleting(sender, instance, **kwargs):
+    # The clinician's links cascade away without m2m_changed.
+    _touch_patients(
+        list(
+            Assignment.objects.filter(clinician_id=instance.pk).values_list("patient_id", flat=True)
+        )
+    )
+
+
+@receiver(post_delete, sender=Patient)
+def _patient_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(resource=Tombstone.PATIENT, object_id=instance.pk)
+
+
+@receiver(post_delete, sender=Procedure)
+def _procedure_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(resource=Tombstone.PROCEDURE, object_id=instance.pk)
@@ -0,0 +1,125 @@
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from ...patients.models import Patient, Procedure
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window(settings):
+    settings.CHANGE_FEED_SETTLE_SECONDS = 0
+
+
+def _make_patients(count):
+    return [
+        Patient.objects.create(
+            name=f"Patient {i}",
+            email=f"feed.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        for i in range(count)
+    ]
+
+
+def _pull(api_client, resource, **params):
+    response = api_client.get(reverse(f"changes-{resource}"), params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+def _drain(api_client, resource, cursor=None, limit=500):
+    changed, deleted = [], []
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = _pull(api_client, resource, **params)
+        changed += page["changed"]
+        deleted += page["deleted"]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return changed, deleted, cursor
+
+
+@pytest.mark.django_db
+class TestChangeFeed:
+    def test_pages_through_changes_and_resumes(self, api_client):
+        patients = _make_patients(5)
+        # Identical timestamps must still page without skipping or repeating rows.
+        Patient.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        changed, deleted, cursor = _drain(api_client, "patients", limit=2)
+        assert [row["id"] for row in changed] == [p.pk for p in patients]
+        assert deleted == []
+        assert changed[0]["clinicians"] == []
+
+        assert _pull(api_client, "patients", cursor=cursor)["changed"] == []
+        patients[1].name = "Renamed"
+        patients[1].save()
+        changed, _, cursor = _drain(api_client, "patients", cursor=cursor)
+        assert [(row["id"], row["name"]) for row in changed] == [(patients[1].pk, "Renamed")]
+
+    def test_since_watermark(self, api_client):
+        old, new = _make_patients(2)
+        watermark = timezone.now() - timedelta(minutes=1)
+        Patient.objects.filter(pk=old.pk).update(updated_at=watermark)
+
+        page = _pull(api_client, "patients", since=watermark.isoformat())
+        assert [row["id"] for row in page["changed"]] == [new.pk]
+
+    def test_deletes_leave_tombstones(self, api_client, clinician):
+        patient, other = _make_patients(2)
+        procedure = Procedure.objects.create(
+            name="ECG", date=timezone.now(), patient=patient, clinician=clinician
+        )
+        _, _, patients_cursor = _drain(api_client, "patients")
+        changed, _, procedures_cursor = _drain(api_client, "procedures")
+        assert changed[0]["patient"] == patient.pk
+        assert changed[0]["clinician"] == clinician.pk
+
+        patient_id, procedure_id = patient.pk, procedure.pk
+        patient.delete()
+        changed, deleted, _ = _drain(api_client, "patients", cursor=patients_cursor)
+        assert changed == []
+        assert [row["id"] for row in deleted] == [patient_id]
+        _, deleted, _ = _drain(api_client, "procedures", cursor=procedures_cursor)
+        assert [row["id"] for row in deleted] == [procedure_id]
+
+    def test_assignment_changes_are_reported_on_patients(self, api_client, clinician):
+        first, second = _make_patients(2)
+        _, _, cursor = _drain(api_client, "patients")
+
+        first.clinicians.add(clinician)
+        clinician.patients.add(second)
+        changed, _, cursor = _drain(api_client, "patients", cursor=cursor)
+        assert {row["id"]: row["clinicians"] for row in changed} == {
+            first.pk: [clinician.pk],
+            second.pk: [clinician.pk],
+        }
+
+        clinician.patients.clear()
+        changed, _, cursor = _drain(api_client, "patients", cursor=cursor)
+        assert {row["id"]: row["clinicians"] for row in changed} == {first.pk: [], second.pk: []}
+
+        first.clinicians.add(clinician)
+        _, _, cursor = _drain(api_client, "patients", cursor=cursor)
+        clinician.delete()
+        changed, _, _ = _drain(api_client, "patients", cursor=cursor)
+        assert [(row["id"], row["clinicians"]) for row in changed] == [(first.pk, [])]
+
+    def test_settle_window_holds_back_recent_rows(self, api_client, settings):
+        settings.CHANGE_FEED_SETTLE_SECONDS = 60
+        _make_patients(1)
+        page = _pull(api_client, "patients")
+        assert page["changed"] == []
+
+        settings.CHANGE_FEED_SETTLE_SECONDS = 0
+        assert len(_pull(api_client, "patients", cursor=page["next_cursor"])["changed"]) == 1
+
+    @pytest.mark.parametrize(
+        "params", [{"cursor": "not-a-cursor"}, {"since": "yesterday"}, {"limit": 0}]
+    )
+    def test_invalid_parameters(self, api_client, params):
+        response = api_client.get(reverse("changes-patients"), params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "error" in response.data
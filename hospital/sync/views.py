@@ -0,0 +1,32 @@
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .feed import DEFAULT_LIMIT, MAX_LIMIT, changes, decode_cursor, initial_position
+
+
+class ChangeFeedViewSet(viewsets.ViewSet):
+    def _feed(self, request, resource):
+        params = request.query_params
+        try:
+            if params.get("cursor"):
+                position = decode_cursor(params["cursor"])
+            else:
+                position = initial_position(params.get("since"))
+            limit = int(params.get("limit", DEFAULT_LIMIT))
+            if not 1 <= limit <= MAX_LIMIT:
+                raise ValueError
+        except ValueError as exc:
+            return Response(
+                {"error": str(exc) or f"limit must be between 1 and {MAX_LIMIT}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(changes(resource, position, limit))
+
+    @action(detail=False, methods=["get"])
+    def patients(self, request):
+        return self._feed(request, "patients")
+
+    @action(detail=False, methods=["get"])
+    def procedures(self, request):
+        return self._feed(request, "procedures")
@@ -6,3 +6,6 @@ DATABASES = {
         "NAME": ":memory:",
     }
 }
+# Not in DATABASE_REPLICAS, so reads stay on default unless a test opts in.
+DATABASES["replica_1"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+DATABASE_REPLICAS = []
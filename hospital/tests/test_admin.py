@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .. import admin as hospital_admin
+from ..admin import EstimatedCountPaginator
+from ..clinicians.models import Clinician
+from ..departments.models import Department
+from ..patients.models import Patient, Procedure
+
+
+def _add_rows(count, offset=0):
+    department = Department.objects.create(name=f"Admin Department {offset}")
+    for i in range(offset, offset + count):
+        clinician = Clinician.objects.create(name=f"Dr. Admin {i}", department=department)
+        patient = Patient.objects.create(
+            name=f"Admin Patient {i}",
+            email=f"admin.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        patient.clinicians.add(clinician)
+        Procedure.objects.create(
+            name="Checkup", date=timezone.now(), patient=patient, clinician=clinician
+        )
+    return patient
+
+
+def _queries(client, url, params=None):
+    # The first request of a test fills per-process caches (content types).
+    client.get(url, params)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestAdminQueryCounts:
+    @pytest.mark.parametrize(
+        "url_name, params",
+        [
+            ("admin:hospital_procedure_changelist", None),
+            ("admin:hospital_procedure_changelist", {"q": "Admin"}),
+            ("admin:hospital_patient_changelist", None),
+            ("admin:hospital_patient_changelist", {"gender__exact": "F"}),
+            ("admin:hospital_clinician_changelist", None),
+            ("admin:hospital_department_changelist", None),
+        ],
+    )
+    def test_changelist_queries_do_not_grow_with_rows(self, admin_client, url_name, params):
+        url = reverse(url_name)
+        _add_rows(2)
+        few = _queries(admin_client, url, params)
+        _add_rows(20, offset=2)
+        assert _queries(admin_client, url, params) == few
+        assert few <= 8
+
+    # Autocomplete widgets render only the selected options.
+    def test_patient_change_form_does_not_list_clinicians(self, admin_client):
+        patient = _add_rows(2)
+        url = reverse("admin:hospital_patient_change", args=[patient.pk])
+        few = _queries(admin_client, url)
+        _add_rows(20, offset=2)
+        assert _queries(admin_client, url) == few
+        content = admin_client.get(url).content.decode()
+        assert "Dr. Admin 1" in content and "Dr. Admin 21" not in content
+
+    def test_procedure_change_form_does_not_list_patients(self, admin_client):
+        _add_rows(2)
+        url = reverse("admin:hospital_procedure_change", args=[Procedure.objects.first().pk])
+        few = _queries(admin_client, url)
+        _add_rows(20, offset=2)
+        assert _queries(admin_client, url) == few
+        content = admin_client.get(url).content.decode()
+        assert "Admin Patient 0" in content and "Admin Patient 21" not in content
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    def test_uses_estimate_only_for_large_unfiltered_tables(self, monkeypatch, settings):
+        _add_rows(3)
+        settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1000
+        monkeypatch.setattr(hospital_admin, "estimated_count", lambda queryset: 5000)
+        assert EstimatedCountPaginator(Patient.objects.order_by("id"), 10).count == 5000
+        filtered = Patient.objects.filter(gender="F").order_by("id")
+        assert EstimatedCountPaginator(filtered, 10).count == 3
+
+        monkeypatch.setattr(hospital_admin, "estimated_count", lambda queryset: 500)
+        assert EstimatedCountPaginator(Patient.objects.order_by("id"), 10).count == 3
+
+    def test_exact_count_without_postgres(self):
+        _add_rows(3)
+        assert EstimatedCountPaginator(Patient.objects.order_by("id"), 10).count == 3
@@ -0,0 +1,58 @@
+import pytest
+from django.core.management import CommandError, call_command
+from ..benchmark import Scenarios, compare, percentile, run_benchmark
+from ..datagen import generate
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) is None
+
+
+@pytest.mark.django_db
+def test_run_benchmark_covers_every_scenario(seeded_dataset):
+    report = run_benchmark(requests=3, warmup=1)
+
+    assert set(report["scenarios"]) == set(Scenarios.names())
+    for name, result in report["scenarios"].items():
+        assert result["requests"] == 3
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert all(code.startswith("2") for code in result["status_codes"]), name
+    assert report["scenarios"]["patient_detail"]["queries_per_request"] == 1
+    assert len(compare(report, report)) == len(report["scenarios"])
+
+
+@pytest.mark.django_db
+def test_existing_database_skips_write_scenarios(seeded_dataset):
+    report = run_benchmark(requests=1, warmup=0, writes=False)
+    assert set(report["scenarios"]) == set(Scenarios.names()) - Scenarios.WRITES
+    assert Scenarios.WRITES <= set(Scenarios.names())
+
+    with pytest.raises(CommandError, match="--include-writes"):
+        call_command("benchmark_api", existing_db=True, scenario=["patient_update"])
+    # A running server is always treated as an existing database.
+    with pytest.raises(CommandError, match="--include-writes"):
+        call_command("benchmark_api", base_url="http://localhost:1", scenario=["patient_bulk"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_benchmark_over_http(live_server):
+    generate(departments=2, clinicians=5, patients=30, procedures=100, seed=3)
+
+    report = run_benchmark(
+        requests=4,
+        warmup=1,
+        only=["patient_detail", "patient_create"],
+        base_url=live_server.url,
+        concurrency=2,
+    )
+
+    assert report["mode"] == "http"
+    for name, result in report["scenarios"].items():
+        assert result["requests"] == 4
+        assert all(code.startswith("2") for code in result["status_codes"]), name
+        assert result["queries_per_request"] is None
+    assert "n/a" in compare(report, report)[0]
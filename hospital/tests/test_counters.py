@@ -0,0 +1,164 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from ..counters import find_drift
+from ..clinicians.models import Clinician
+from ..departments.models import Department
+from ..patients.models import Patient, Procedure
+
+
+def _counts(obj):
+    obj.refresh_from_db(fields=["patient_count", "procedure_count"])
+    return obj.patient_count, obj.procedure_count
+
+
+@pytest.fixture
+def hospital_setup(db):
+    cardiology = Department.objects.create(name="Cardiology")
+    neurology = Department.objects.create(name="Neurology")
+    smith = Clinician.objects.create(name="Dr. Smith", department=cardiology)
+    jones = Clinician.objects.create(name="Dr. Jones", department=cardiology)
+    brain = Clinician.objects.create(name="Dr. Brain", department=neurology)
+    patients = [
+        Patient.objects.create(
+            name=f"Patient {i}",
+            email=f"counter.{i}@example.com",
+            gender="F",
+            date_of_birth="1980-01-01",
+        )
+        for i in range(3)
+    ]
+    return cardiology, neurology, smith, jones, brain, patients
+
+
+@pytest.mark.django_db
+class TestDenormalizedCounters:
+    def test_assignment_changes(self, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        first, second, third = patients
+
+        first.clinicians.add(smith, jones, brain)
+        smith.patients.add(second, third)
+        assert _counts(smith) == (3, 0)
+        assert _counts(cardiology) == (3, 0)
+        assert _counts(neurology) == (1, 0)
+
+        first.clinicians.remove(smith)
+        assert _counts(smith) == (2, 0)
+        assert _counts(cardiology) == (3, 0)
+
+        # Removing links that do not exist leaves the counters alone.
+        first.clinicians.remove(smith)
+        brain.patients.remove(second)
+        assert _counts(smith) == (2, 0)
+        assert _counts(brain) == (1, 0)
+        assert _counts(neurology) == (1, 0)
+
+        first.clinicians.clear()
+        assert _counts(jones) == (0, 0)
+        first.clinicians.remove(jones)
+        assert _counts(jones) == (0, 0)
+        assert _counts(cardiology) == (2, 0)
+        assert _counts(neurology) == (0, 0)
+
+        smith.patients.set([third])
+        assert _counts(smith) == (1, 0)
+        assert _counts(cardiology) == (1, 0)
+        assert find_drift() == []
+
+    def test_procedure_changes(self, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        procedure = Procedure.objects.create(
+            name="ECG", date=timezone.now(), patient=patients[0], clinician=smith
+        )
+        Procedure.objects.create(
+            name="MRI", date=timezone.now(), patient=patients[0], clinician=brain
+        )
+        assert _counts(smith) == (0, 1)
+        assert _counts(cardiology) == (0, 1)
+
+        procedure.clinician = brain
+        procedure.save()
+        assert _counts(smith) == (0, 0)
+        assert _counts(brain) == (0, 2)
+        assert _counts(neurology) == (0, 2)
+
+        procedure.name = "Echo"
+        procedure.save()
+        assert _counts(brain) == (0, 2)
+
+        procedure.delete()
+        assert _counts(neurology) == (0, 1)
+        assert find_drift() == []
+
+    def test_cascading_deletes_and_moves(self, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        patients[0].clinicians.add(smith, brain)
+        patients[1].clinicians.add(smith, jones)
+        Procedure.objects.create(
+            name="ECG", date=timezone.now(), patient=patients[0], clinician=smith
+        )
+
+        patients[0].delete()
+        assert _counts(smith) == (1, 0)
+        assert _counts(cardiology) == (1, 0)
+        assert _counts(neurology) == (0, 0)
+
+        jones.department = neurology
+        jones.save()
+        assert _counts(cardiology) == (1, 0)
+        assert _counts(neurology) == (1, 0)
+
+        smith.delete()
+        assert _counts(cardiology) == (0, 0)
+        assert find_drift() == []
+
+    def test_stale_instance_save_keeps_counters(self, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        stale = Clinician.objects.get(pk=smith.pk)
+        patients[0].clinicians.add(smith)
+
+        stale.name = "Dr. Smith Jr."
+        stale.save()
+        assert _counts(smith) == (1, 0)
+
+    def test_by_department_reads_counters(self, api_client, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        smith.patients.add(*patients)
+
+        url = reverse("clinician-patient-count-by-department")
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.get(url, {"department_id": cardiology.pk})
+        assert {row["clinician_name"]: row["patient_count"] for row in response.data} == {
+            "Dr. Smith": 3,
+            "Dr. Jones": 0,
+        }
+        [query] = context.captured_queries
+        assert "COUNT(" not in query["sql"].upper()
+
+    def test_recompute_counters_command(self, hospital_setup):
+        cardiology, neurology, smith, jones, brain, patients = hospital_setup
+        smith.patients.add(*patients)
+        call_command("recompute_counters", verify=True, verbosity=0)
+
+        Clinician.objects.filter(pk=smith.pk).update(patient_count=42)
+        with pytest.raises(CommandError):
+            call_command("recompute_counters", verify=True, verbosity=0)
+
+        call_command("recompute_counters", verbosity=0)
+        assert _counts(smith) == (3, 0)
+        assert find_drift() == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("run", [1, 2])
+def test_seeded_dataset_is_consistent_and_isolated(seeded_dataset, run):
+    assert find_drift() == []
+    # Each run sees the full dataset again: the previous run's deletes were
+    # rolled back with its savepoint.
+    assert Patient.objects.count() == seeded_dataset["patients"]
+    Patient.objects.filter(id__in=Patient.objects.order_by("id").values("id")[:10]).delete()
+    assert find_drift() == []
@@ -0,0 +1,53 @@
+import pytest
+from django.core.management import CommandError, call_command
+from ..clinicians.models import Clinician
+from ..departments.models import Department
+from ..patients.models import Patient, Procedure
+
+
+def _snapshot():
+    return {
+        "departments": list(Department.objects.order_by("id").values_list("name", flat=True)),
+        "clinicians": list(
+            Clinician.objects.order_by("id").values_list("name", "department__name")
+        ),
+        "patients": list(Patient.objects.order_by("id").values_list("email", "date_of_birth")),
+        "procedures": list(
+            Procedure.objects.order_by("id").values_list(
+                "name", "patient__email", "clinician__name"
+            )
+        ),
+    }
+
+
+@pytest.mark.django_db
+class TestGenerateData:
+    def test_generates_requested_volume(self):
+        call_command(
+            "generate_data",
+            departments=4,
+            clinicians=30,
+            patients=200,
+            procedures=1500,
+            batch_size=100,
+            verbosity=0,
+        )
+        assert Department.objects.count() == 4
+        assert Clinician.objects.count() == 30
+        assert Patient.objects.count() == 200
+        assert Procedure.objects.count() == 1500
+        assert Patient.clinicians.through.objects.count() >= 200
+
+    def test_same_seed_reproduces_dataset(self):
+        options = dict(departments=3, clinicians=10, patients=50, procedures=300, seed=42)
+        call_command("generate_data", verbosity=0, **options)
+        first = _snapshot()
+        for model in (Procedure, Patient, Clinician, Department):
+            model.objects.all().delete()
+
+        call_command("generate_data", verbosity=0, **options)
+        assert _snapshot() == first
+
+    def test_requires_patients_and_clinicians(self):
+        with pytest.raises(CommandError):
+            call_command("generate_data", patients=0, verbosity=0)
@@ -0,0 +1,77 @@
+import json
+import logging
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from ..instrumentation import RequestStats, fingerprint
+
+
+@pytest.fixture
+def instrumented(settings):
+    settings.REQUEST_INSTRUMENTATION = True
+    settings.SLOW_REQUEST_MS = 60_000
+    settings.SLOW_REQUEST_QUERIES = 1000
+    return settings
+
+
+def _timings(response):
+    return {
+        metric.split(";")[0]: metric.split(";", 1)[1]
+        for metric in response["Server-Timing"].split(", ")
+    }
+
+
+def test_fingerprint_collapses_in_lists():
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)") == fingerprint(
+        "SELECT * FROM t WHERE id IN (%s)"
+    )
+
+
+def test_duplicate_queries_are_grouped():
+    stats = RequestStats()
+    for sql in ["SELECT 1 WHERE id = %s"] * 3 + ["SELECT 2"]:
+        stats.record_query(lambda *args: None, sql, (), False, {})
+    assert stats.queries == 4
+    assert stats.duplicates() == {"SELECT 1 WHERE id = %s": 3}
+
+
+@pytest.mark.django_db
+def test_disabled_by_default(api_client, patient):
+    response = api_client.get(reverse("patient-detail", kwargs={"pk": patient.pk}))
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.django_db
+def test_server_timing_header(api_client, patient, instrumented, caplog):
+    response = api_client.get(reverse("patient-list"))
+    timings = _timings(response)
+    assert timings["db"].endswith('desc="2 queries"')
+    assert timings["dupes"] == 'desc="0 duplicate queries"'
+    assert timings["serializer"].startswith("dur=")
+    assert timings["total"].startswith("dur=")
+    assert not caplog.records
+
+
+@pytest.mark.django_db
+def test_slow_request_log(api_client, patient, instrumented, caplog):
+    instrumented.SLOW_REQUEST_QUERIES = 1
+    with caplog.at_level(logging.WARNING, logger="hospital.instrumentation"):
+        api_client.get(reverse("patient-detail", kwargs={"pk": patient.pk}))
+
+    [record] = caplog.records
+    assert record.request_stats == json.loads(record.args[0])
+    assert record.request_stats["path"] == f"/api/patients/{patient.pk}/"
+    assert record.request_stats["status"] == 200
+    assert record.request_stats["queries"] == 1
+    assert record.request_stats["duplicate_queries"] == []
+
+
+@pytest.mark.django_db
+def test_server_timing_under_asgi(patient, instrumented):
+    async def fetch():
+        return await AsyncClient().get(reverse("async-patient-detail", kwargs={"pk": patient.pk}))
+
+    response = async_to_sync(fetch)()
+    assert response.status_code == 200
+    assert _timings(response)["db"].endswith('desc="1 queries"')
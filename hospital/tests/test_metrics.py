@@ -0,0 +1,73 @@
+import threading
+import pytest
+from django.urls import reverse
+from .. import metrics
+
+
+def _sample(text, prefix):
+    [line] = [line for line in text.splitlines() if line.startswith(prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_histogram_sums_thread_shards():
+    histogram = metrics.Histogram(
+        "test_shard_seconds", "Test histogram.", ["route"], buckets=(1, 5)
+    )
+    threads = [
+        threading.Thread(target=lambda: [histogram.observe(2, "a") for _ in range(100)])
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    histogram.observe(0.5, "a")
+    histogram.observe(7, "b")
+
+    text = "\n".join(histogram.render())
+    assert "# TYPE test_shard_seconds histogram" in text
+    assert _sample(text, 'test_shard_seconds_bucket{route="a",le="1.0"}') == 1
+    assert _sample(text, 'test_shard_seconds_bucket{route="a",le="5.0"}') == 401
+    assert _sample(text, 'test_shard_seconds_bucket{route="a",le="+Inf"}') == 401
+    assert _sample(text, 'test_shard_seconds_sum{route="a"}') == 800.5
+    assert _sample(text, 'test_shard_seconds_count{route="b"}') == 1
+    assert _sample(text, 'test_shard_seconds_bucket{route="b",le="5.0"}') == 0
+
+
+def test_shards_do_not_grow_with_threads():
+    counter = metrics.Counter("test_threads_total", "Test counter.")
+    threads = [
+        threading.Thread(target=lambda: [counter.inc() for _ in range(1000)]) for _ in range(40)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(counter._shards) == metrics.SHARDS
+    assert _sample("\n".join(counter.render()), "test_threads_total") == 40000
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("test_escape_total", "Test counter.", ["path"])
+    counter.inc('a"b\\c')
+    assert 'test_escape_total{path="a\\"b\\\\c"} 1' in counter.render()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(api_client, patient, clinician, department):
+    route = 'route="patient-detail",method="GET",status="200"'
+    api_client.get(reverse("patient-detail", kwargs={"pk": patient.pk}))
+    url = reverse("clinician-patient-count-by-department")
+    api_client.get(url, {"department_id": department["id"]})
+    api_client.get(url, {"department_id": department["id"]})
+
+    response = api_client.get(reverse("metrics"))
+    assert response["Content-Type"] == metrics.CONTENT_TYPE
+    text = response.content.decode()
+    assert _sample(text, f"hospital_http_request_duration_seconds_count{{{route}}}") >= 1
+    assert _sample(text, "hospital_http_requests_in_flight") == 1
+    assert 'hospital_db_query_duration_seconds_count{database="default"}' in text
+    assert _sample(text, 'hospital_cache_hit_ratio{namespace="by_department"}') == 0.5
+    assert (
+        _sample(text, 'hospital_cache_requests_total{namespace="by_department",result="hit"}') == 1
+    )
@@ -0,0 +1,144 @@
+import pytest
+from datetime import date, datetime, timezone as dt_timezone
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from ..admin import estimated_count
+from ..clinicians.models import Clinician
+from ..counters import find_drift
+from ..partitioning import (
+    DEFAULT_PARTITION,
+    add_months,
+    create_partition_sql,
+    is_partitioned,
+    month_starts,
+    partition_month,
+    partitions,
+)
+from ..patients.models import Patient, Procedure
+from ..sync.models import Tombstone
+
+
+def test_month_arithmetic():
+    assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert month_starts(date(2024, 11, 15), date(2025, 1, 2)) == [
+        date(2024, 11, 1),
+        date(2024, 12, 1),
+        date(2025, 1, 1),
+    ]
+    assert partition_month("hospital_procedure_p202402") == date(2024, 2, 1)
+    assert not partition_month("hospital_procedure_default")
+
+
+def test_partition_bounds_cover_one_month():
+    sql = create_partition_sql(date(2024, 12, 1))
+    assert '"hospital_procedure_p202412" PARTITION OF "hospital_procedure"' in sql
+    assert "FROM ('2024-12-01 00:00:00+00') TO ('2025-01-01 00:00:00+00')" in sql
+
+
+@pytest.mark.django_db
+def test_command_requires_postgresql():
+    if connection.vendor == "postgresql":
+        pytest.skip("checks the non-PostgreSQL error")
+    with pytest.raises(CommandError, match="PostgreSQL"):
+        call_command("partition_procedures")
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="table partitioning is PostgreSQL-only"
+)
+@pytest.mark.django_db(transaction=True)
+def test_partition_and_drop_old_months(patient, clinician):
+    for month in (1, 2, 3):
+        Procedure.objects.create(
+            name="Checkup",
+            date=datetime(2024, month, 10, tzinfo=dt_timezone.utc),
+            patient=patient,
+            clinician=clinician,
+        )
+    call_command("partition_procedures", months_ahead=1, verbosity=0)
+    with connection.cursor() as cursor:
+        assert is_partitioned(cursor)
+        assert "hospital_procedure_p202402" in partitions(cursor)
+
+    # The ORM keeps working against the partitioned table.
+    procedure = Procedure.objects.create(
+        name="X-Ray",
+        date=datetime(2024, 3, 11, tzinfo=dt_timezone.utc),
+        patient=patient,
+        clinician=clinician,
+    )
+    procedure.date = datetime(2024, 1, 11, tzinfo=dt_timezone.utc)
+    procedure.save()
+    assert Procedure.objects.filter(date__month=1).count() == 2
+
+    call_command("partition_procedures", drop_before="2024-02", verbosity=0)
+    assert Procedure.objects.count() == 2
+    assert Tombstone.objects.filter(resource=Tombstone.PROCEDURE).count() == 2
+    assert find_drift() == []
+
+
+def _partition_of(procedure):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT tableoid::regclass::text FROM "hospital_procedure" WHERE id = %s',
+            [procedure.pk],
+        )
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="table partitioning is PostgreSQL-only"
+)
+@pytest.mark.django_db(transaction=True)
+def test_partitioned_table_keeps_keys_and_counters(patient, clinician):
+    other = Clinician.objects.create(name="Dr. Jones", department=clinician.department)
+    patient.clinicians.add(clinician)
+    for month in (4, 5, 6):
+        Procedure.objects.create(
+            name="Checkup",
+            date=datetime(2024, month, 10, tzinfo=dt_timezone.utc),
+            patient=patient,
+            clinician=clinician,
+        )
+    call_command("partition_procedures", months_ahead=1, verbosity=0)
+
+    # Past the created months, rows land in the default partition.
+    far = Procedure.objects.create(
+        name="Follow-up",
+        date=datetime(2099, 6, 1, tzinfo=dt_timezone.utc),
+        patient=patient,
+        clinician=other,
+    )
+    assert _partition_of(far) == DEFAULT_PARTITION
+    # Autovacuum analyzes the partitions but never their parent.
+    with connection.cursor() as cursor:
+        for name in partitions(cursor):
+            cursor.execute(f'ANALYZE "{name}"')
+    assert estimated_count(Procedure.objects.all()) == 4
+    assert Procedure.objects.get(pk=far.pk).clinician == other
+
+    # The foreign keys were recreated on the partitioned table.
+    with pytest.raises(IntegrityError), transaction.atomic():
+        Procedure.objects.create(
+            name="Orphan",
+            date=datetime(2024, 5, 1, tzinfo=dt_timezone.utc),
+            patient_id=patient.pk + 1000,
+            clinician=clinician,
+        )
+
+    patient.clinicians.add(other)
+    call_command("partition_procedures", drop_before="2024-06", verbosity=0)
+    with connection.cursor() as cursor:
+        assert "hospital_procedure_p202405" not in partitions(cursor)
+    assert Procedure.objects.count() == 2
+    assert find_drift() == []
+    other.refresh_from_db()
+    assert (other.patient_count, other.procedure_count) == (1, 1)
+
+    # Cascades reach every partition, the default one included.
+    Patient.objects.filter(pk=patient.pk).delete()
+    assert not Procedure.objects.exists()
+    assert find_drift() == []
+    clinician.refresh_from_db()
+    assert (clinician.patient_count, clinician.procedure_count) == (0, 0)
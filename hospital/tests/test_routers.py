@@ -0,0 +1,124 @@
+import pytest
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from ..cache import BY_PROCEDURE, cached_response, invalidate
+from ..patients.models import Patient
+from ..routers import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ["replica_1", "replica_2"]
+    settings.REPLICA_PIN_SECONDS = 7
+    return settings.DATABASE_REPLICAS
+
+
+def _routed(request):
+    seen = {}
+
+    def view(request):
+        seen["read"] = Patient.objects.all().db
+        return HttpResponse()
+
+    response = ReplicaRoutingMiddleware(view)(request)
+    return seen, response
+
+
+def test_safe_requests_read_from_a_replica(replicas):
+    seen, response = _routed(RequestFactory().get("/api/patients/"))
+    assert seen["read"] in replicas
+    assert PIN_COOKIE not in response.cookies
+
+
+def test_writes_pin_the_client_to_the_primary(replicas):
+    seen, response = _routed(RequestFactory().post("/api/patients/"))
+    assert seen["read"] == "default"
+    assert response.cookies[PIN_COOKIE]["max-age"] == 7
+
+    request = RequestFactory().get("/api/patients/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    seen, _ = _routed(request)
+    assert seen["read"] == "default"
+
+
+def _cached(request, seen):
+    def compute():
+        seen.append(Patient.objects.all().db)
+        return Response([])
+
+    def view(request):
+        return cached_response(BY_PROCEDURE, request, compute)
+
+    return ReplicaRoutingMiddleware(view)(request)["X-Cache"]
+
+
+def test_replica_reads_are_not_cached_right_after_an_invalidation(replicas, db, monkeypatch):
+    seen = []
+    invalidate(BY_PROCEDURE)
+    assert _cached(RequestFactory().get("/by_procedure/"), seen) == "MISS"
+    assert _cached(RequestFactory().get("/by_procedure/"), seen) == "MISS"
+    assert seen[0] in replicas and seen[1] in replicas
+
+    # Pinned clients read the primary, which is never behind.
+    request = RequestFactory().get("/by_procedure/")
+    request.COOKIES[PIN_COOKIE] = "1"
+    assert _cached(request, seen) == "MISS"
+    assert _cached(RequestFactory().get("/by_procedure/"), seen) == "HIT"
+    assert seen[2] == "default"
+
+    invalidate(BY_PROCEDURE)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 7)
+    assert _cached(RequestFactory().get("/by_procedure/"), seen) == "MISS"
+    assert _cached(RequestFactory().get("/by_procedure/"), seen) == "HIT"
+    assert seen[3] in replicas
+
+
+@pytest.mark.skipif(
+    "replica_1" not in settings.DATABASES, reason="needs the replica_1 alias of test_settings"
+)
+@pytest.mark.django_db(transaction=True, databases=["default", "replica_1"])
+def test_requests_read_from_a_replica_alias(settings, api_client, patient):
+    settings.DATABASE_REPLICAS = ["replica_1"]
+    url = reverse("patient-detail", kwargs={"pk": patient.pk})
+    with CaptureQueriesContext(connections["replica_1"]) as replica:
+        with CaptureQueriesContext(connections["default"]) as primary:
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+    assert len(replica) > 0 and len(primary) == 0
+
+    data = {"name": "Ann", "gender": "F", "email": "ann@example.com", "date_of_birth": "1990-01-01"}
+    response = api_client.post(reverse("patient-list"), data)
+    assert response.status_code == status.HTTP_201_CREATED
+    with CaptureQueriesContext(connections["replica_1"]) as replica:
+        with CaptureQueriesContext(connections["default"]) as primary:
+            assert api_client.get(url).status_code == status.HTTP_200_OK
+    assert len(replica) == 0 and len(primary) > 0
+
+
+def test_reads_outside_requests_use_the_primary(replicas):
+    assert Patient.objects.all().db == "default"
+
+
+def test_instances_read_from_a_replica_save_to_the_primary(replicas):
+    patient = Patient(name="Replica Read")
+    patient._state.db = "replica_1"
+    other = Patient(name="Primary Read")
+    other._state.db = "default"
+    router = ReplicaRouter()
+    assert router.db_for_write(Patient, instance=patient) == "default"
+    assert router.allow_relation(patient, other) is True
+    assert router.allow_migrate("replica_1", "hospital") is False
+    assert router.allow_migrate("default", "hospital") is None
+
+
+def test_middleware_unused_without_replicas():
+    with pytest.raises(MiddlewareNotUsed):
+        ReplicaRoutingMiddleware(lambda request: HttpResponse())
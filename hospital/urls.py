@@ -1,15 +1,41 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .patients.views import PatientViewSet, ClinicianPatientCountViewSet
+from .patients import async_views
+from .patients.views import ClinicianPatientCountViewSet, PatientViewSet, ProcedureViewSet
+from .rollups.views import DepartmentRollupViewSet
+from .sync.views import ChangeFeedViewSet
+from .views import CacheStatsViewSet, metrics_view
 
 router = DefaultRouter()
 router.register(r"patients", PatientViewSet)
 router.register(
     r"clinician-patient-counts", ClinicianPatientCountViewSet, basename="clinician-patient-count"
 )
+router.register(r"procedures", ProcedureViewSet, basename="procedure")
+router.register(r"cache-stats", CacheStatsViewSet, basename="cache-stats")
+router.register(r"changes", ChangeFeedViewSet, basename="changes")
+router.register(r"department-rollups", DepartmentRollupViewSet)
+
+# Async variants of the read endpoints, for serving under ASGI.
+async_urlpatterns = [
+    path("patients/", async_views.patient_list, name="async-patient-list"),
+    path("patients/<int:pk>/", async_views.patient_detail, name="async-patient-detail"),
+    path(
+        "patients/by_procedure/",
+        async_views.patients_by_procedure,
+        name="async-patient-by-procedure",
+    ),
+    path(
+        "clinician-patient-counts/by_department/",
+        async_views.patient_counts_by_department,
+        name="async-clinician-patient-count-by-department",
+    ),
+]
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/async/", include(async_urlpatterns)),
     path("api/", include(router.urls)),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,13 @@
+from django.http import HttpResponse
+from rest_framework import viewsets
+from rest_framework.response import Response
+from . import cache, metrics
+
+
+class CacheStatsViewSet(viewsets.ViewSet):
+    def list(self, request):
+        return Response(cache.stats.snapshot())
+
+
+def metrics_view(request):
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
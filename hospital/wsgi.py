@@ -0,0 +1,11 @@
+import os
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from whitenoise import WhiteNoise
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hospital.settings")
+
+# Gunicorn serves static files (admin, browsable API) itself; there is no proxy in front.
+application = WhiteNoise(
+    get_wsgi_application(), root=settings.STATIC_ROOT, prefix=settings.STATIC_URL
+)